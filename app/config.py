@@ -12,4 +12,75 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 JWT_SECRET = os.getenv("JWT_SECRET")
 
+# Capacidad del buffer global de entropía, en bits. Al estar empaquetado (8 bits por byte),
+# un buffer de varios millones de bits ocupa solo unos cientos de KB.
+BUFFER_CAPACITY_BITS = int(os.getenv("BUFFER_CAPACITY_BITS", "1048576"))
 
+# Máximo de shots por job del simulador (cada shot son 28 bits). 40000 shots ~ 1.1 Mbit por job.
+ENTROPY_MAX_SHOTS = int(os.getenv("ENTROPY_MAX_SHOTS", "40000"))
+
+# Procesos productores de entropía. Con 0 la simulación se hace en un hilo del propio proceso.
+ENTROPY_WORKERS = int(os.getenv("ENTROPY_WORKERS", "0"))
+
+# Marcas de agua del buffer (fracción de la capacidad): por debajo de la baja se rellena
+# hasta la alta; entre medias el productor duerme sin gastar CPU.
+BUFFER_LOW_WATERMARK = float(os.getenv("BUFFER_LOW_WATERMARK", "0.5"))
+BUFFER_HIGH_WATERMARK = float(os.getenv("BUFFER_HIGH_WATERMARK", "1.0"))
+
+# Reserva persistente de entropía en disco (mmap) para arranques en caliente. Vacía = desactivada.
+ENTROPY_RESERVE_PATH = os.getenv("ENTROPY_RESERVE_PATH", "")
+ENTROPY_RESERVE_BYTES = int(os.getenv("ENTROPY_RESERVE_BYTES", str(16 * 1024 * 1024)))
+
+
+# Plantillas de circuito (ya transpiladas) que se guardan para /keys/seed, una por num_qubits (LRU).
+SEED_TEMPLATE_CACHE_SIZE = int(os.getenv("SEED_TEMPLATE_CACHE_SIZE", "8"))
+
+# Profundidad del pool de pares de claves RSA precalculados, por tamaño de clave ("bits:pares,...").
+RSA_POOL_DEPTHS = os.getenv("RSA_POOL_DEPTHS", "2048:4,3072:2,4096:1")
+
+# Procesos para las pruebas de primalidad del motor de primos (claves RSA). Con 0 se busca en el propio proceso.
+# Vacío o sin definir: si el pool de claves RSA está activo, un proceso por cada 2 CPUs (Miller-Rabin con primos de
+# 1024-2048 bits tiene el GIL cogido decenas de ms por pow() y no debe competir con las peticiones); si no, 0.
+PRIME_WORKERS = int(os.getenv("PRIME_WORKERS") or (max(1, (os.cpu_count() or 2) // 2) if RSA_POOL_DEPTHS.strip() else 0))
+
+# Caché de usuarios de get_current_user: segundos que dura cada entrada y número máximo de usuarios.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Bcrypt: coste de los hashes, hilos dedicados a hashear/verificar y segundos máximos de espera en su cola.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+PASSWORD_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Caché de tokens JWT ya verificados: número máximo de tokens y duración máxima (cada uno caduca con su exp).
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "1800"))
+
+# Pool de conexiones de MongoDB (motor): tamaño, timeouts en milisegundos y compresión de red
+# ("zstd", "snappy" y "zlib"; zstd y snappy necesitan sus librerías instaladas). Vacío = sin compresión.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "4"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
+
+# Alta masiva de usuarios (POST /users/bulk): procesos para hashear (0 = uno por CPU), usuarios por
+# insert_many y máximo de usuarios por petición.
+PASSWORD_BULK_WORKERS = int(os.getenv("PASSWORD_BULK_WORKERS", "0"))
+BULK_USERS_BATCH_SIZE = int(os.getenv("BULK_USERS_BATCH_SIZE", "500"))
+BULK_USERS_MAX = int(os.getenv("BULK_USERS_MAX", "10000"))
+
+# Preparar el backend de entropía al arrancar (lifespan; con Aer: importar qiskit, crear el simulador
+# y transpilar el circuito), antes de atender peticiones. Con false se hace en la primera petición que lo necesite.
+QUANTUM_WARMUP = os.getenv("QUANTUM_WARMUP", "true").lower() == "true"
+
+# Backend de entropía del buffer: "aer" (simulador, por defecto), "aer-stabilizer", "clifford"
+# (muestreo directo del circuito de Clifford, sin simulador) o "stub" (solo tests).
+# Ver app/core/entropy_backends.py y benchmarks/entropy_backends.py para comparar bits/s.
+ENTROPY_BACKEND = os.getenv("ENTROPY_BACKEND", "aer")
+ENTROPY_STABILIZER_MAX_SHOTS = int(os.getenv("ENTROPY_STABILIZER_MAX_SHOTS", "160000"))
+
+# Permite backends de entropía que no sirven para claves reales (stub: semilla fija). SOLO para tests.
+ALLOW_INSECURE_ENTROPY = os.getenv("ALLOW_INSECURE_ENTROPY", "false").lower() == "true"
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+DocString:
+
+Buffer circular de bits empaquetados (8 bits por byte) respaldado por un array
+NumPy de uint8.
+
+    - Escrituras y lecturas O(n) sobre los bits afectados, sin copiar el resto del buffer.
+    - Lectura a nivel de bit (array de 0/1) y a nivel de byte (bytes), para que quien
+      necesite bytes no construya nunca un int de Python por cada bit.
+    - El orden de los bits es big-endian dentro de cada byte: el primer bit que entra es
+      el bit más significativo, igual que int("".join(bits), 2).
+
+La clase NO es thread-safe: el lock lo pone quien la usa (app.routers.g_buffer).
+"""
+
+import numpy as np
+
+
+class BitRingBuffer:
+
+    def __init__(self, capacity_bits: int):
+        """
+        Crea un buffer con capacidad para capacity_bits bits (se redondea hacia arriba
+        a un múltiplo de 8, para que cada bit tenga su byte fijo dentro del array).
+        """
+        if capacity_bits <= 0:
+            raise ValueError("La capacidad del buffer debe ser mayor que 0")
+
+        self.capacity = ((capacity_bits + 7) // 8) * 8
+        self._data = np.zeros(self.capacity // 8, dtype=np.uint8)
+        self._head = 0  # --> posición (en bits) del siguiente bit a leer
+        self._size = 0  # --> número de bits almacenados
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        """Bits que todavía caben en el buffer."""
+        return self.capacity - self._size
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
+
+    # Segmentos contiguos (sin vuelta) del array -----------------------------------------
+
+    def _segments(self, start: int, n: int):
+        """
+        Divide el rango circular [start, start+n) en como mucho dos rangos contiguos
+        (posición, longitud) dentro del array. Como la capacidad es múltiplo de 8, el
+        corte del segundo segmento siempre cae en frontera de byte.
+        """
+        first = min(n, self.capacity - start)
+        yield start, first
+        if n > first:
+            yield 0, n - first
+
+    def _read_segment(self, start: int, n: int) -> np.ndarray:
+        offset = start % 8
+        first_byte = start // 8
+        last_byte = (start + n + 7) // 8
+        bits = np.unpackbits(self._data[first_byte:last_byte])
+        return bits[offset:offset + n]
+
+    def _write_segment(self, start: int, bits: np.ndarray) -> None:
+        n = len(bits)
+        offset = start % 8
+        first_byte = start // 8
+        last_byte = (start + n + 7) // 8
+
+        if offset == 0 and n % 8 == 0:
+            self._data[first_byte:last_byte] = np.packbits(bits)
+            return
+
+        # Lectura-modificación-escritura solo de los bytes frontera
+        span = np.unpackbits(self._data[first_byte:last_byte])
+        span[offset:offset + n] = bits
+        self._data[first_byte:last_byte] = np.packbits(span)
+
+    # API pública --------------------------------------------------------------------
+
+    def write_bits(self, bits) -> int:
+        """
+        Añade bits (secuencia de 0/1) al final del buffer. Si no caben todos, se
+        descartan los que sobran.
+
+        Returns:
+
+            int: número de bits escritos realmente.
+        """
+        bits = np.asarray(bits, dtype=np.uint8)
+        n = min(len(bits), self.free)
+        if n == 0:
+            return 0
+
+        tail = (self._head + self._size) % self.capacity
+        written = 0
+        for pos, length in self._segments(tail, n):
+            self._write_segment(pos, bits[written:written + length])
+            written += length
+
+        self._size += n
+        return n
+
+    def write_bytes(self, data: bytes) -> int:
+        """
+        Añade los 8*len(data) bits de data al final del buffer. Si el final del buffer
+        está alineado a byte se copian los bytes directamente, sin desempaquetar.
+
+        Returns:
+
+            int: número de bits escritos realmente.
+        """
+        tail = (self._head + self._size) % self.capacity
+        if tail % 8:
+            return self.write_bits(np.unpackbits(np.frombuffer(data, dtype=np.uint8)))
+
+        raw = np.frombuffer(data, dtype=np.uint8)[: self.free // 8]
+        written = 0
+        for pos, length in self._segments(tail, len(raw) * 8):
+            nbytes = length // 8
+            self._data[pos // 8: pos // 8 + nbytes] = raw[written:written + nbytes]
+            written += nbytes
+
+        self._size += written * 8
+        return written * 8
+
+    def read_bits(self, n: int) -> np.ndarray:
+        """
+        Extrae y consume n bits del principio del buffer.
+
+        Returns:
+
+            np.ndarray: array uint8 de longitud n con valores 0/1.
+        """
+        if n > self._size:
+            raise ValueError(f"Se han pedido {n} bits y el buffer solo tiene {self._size}")
+
+        parts = [self._read_segment(pos, length) for pos, length in self._segments(self._head, n)]
+        self._consume(n)
+
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def read_bytes(self, nbytes: int) -> bytes:
+        """
+        Extrae y consume 8*nbytes bits del principio del buffer y los devuelve
+        empaquetados. Si el principio del buffer está alineado a byte no se
+        desempaqueta nada: se copian los bytes tal cual.
+        """
+        n = nbytes * 8
+        if n > self._size:
+            raise ValueError(f"Se han pedido {n} bits y el buffer solo tiene {self._size}")
+
+        if self._head % 8:
+            return np.packbits(self.read_bits(n)).tobytes()
+
+        data = b"".join(
+            self._data[pos // 8: (pos + length) // 8].tobytes()
+            for pos, length in self._segments(self._head, n)
+        )
+        self._consume(n)
+
+        return data
+
+    def _consume(self, n: int) -> None:
+        self._size -= n
+        # Con el buffer vacío volvemos a la posición 0 para que las siguientes
+        # escrituras y lecturas vuelvan a estar alineadas a byte.
+        self._head = 0 if self._size == 0 else (self._head + n) % self.capacity
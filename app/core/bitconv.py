@@ -0,0 +1,104 @@
+"""
+DocString:
+
+Capa común de conversión de bits, vectorizada con NumPy, para todos los routers.
+
+Sustituye a las conversiones elemento a elemento del tipo int("".join(map(str, bits)), 2):
+
+    - bits  -> bytes, bytes -> bits y bits -> cadena "0101..."
+    - bits  -> enteros sin signo de cualquier ancho (uint64 vectorizado hasta 64 bits y
+               enteros de Python, montados a partir de bytes, por encima)
+    - bits  -> floats en [0, 1) con 53 bits de precisión (la mantisa completa de un double)
+
+Convenio de orden: big-endian, el primer bit es el más significativo (igual que el buffer).
+"""
+
+import numpy as np
+
+
+FLOAT_BITS = 53 # --> bits de mantisa de un double: más bits no cambian el float resultante
+
+
+def as_bit_array(bits) -> np.ndarray:
+    """Convierte una secuencia de 0/1 (lista, array...) en un array uint8."""
+    return np.asarray(bits, dtype=np.uint8)
+
+
+def bits_to_bytes(bits) -> bytes:
+    """Empaqueta bits en bytes (el último byte se rellena con ceros por la derecha)."""
+    return np.packbits(as_bit_array(bits)).tobytes()
+
+
+def bytes_to_bits(data: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def bits_to_bitstring(bits) -> str:
+    """Devuelve los bits como cadena de '0' y '1' sin recorrerlos en Python."""
+    return (as_bit_array(bits) + ord("0")).tobytes().decode("ascii")
+
+
+def _pack_rows(bits: np.ndarray, width: int) -> np.ndarray:
+    """
+    Agrupa los bits en filas de width bits y empaqueta cada fila en bytes big-endian,
+    rellenando con ceros por la IZQUIERDA para que el valor no cambie.
+    """
+    rows = bits[: len(bits) - len(bits) % width].reshape(-1, width)
+    pad = (-width) % 8
+    if pad:
+        rows = np.concatenate([np.zeros((len(rows), pad), dtype=np.uint8), rows], axis=1)
+    return np.packbits(rows, axis=1)
+
+
+def bits_to_uints(bits, width: int) -> np.ndarray:
+    """
+    Convierte un flujo de bits en enteros sin signo consecutivos de width bits
+    (los bits sobrantes del final se ignoran).
+
+    Returns:
+
+        np.ndarray: uint64 si width <= 64; si no, array de objetos con ints de Python.
+    """
+    if width <= 0:
+        raise ValueError("El ancho debe ser mayor que 0")
+
+    packed = _pack_rows(as_bit_array(bits), width)
+    nbytes = packed.shape[1]
+
+    if width <= 64:
+        # Rellenamos cada fila hasta 8 bytes y la vemos como uint64 big-endian
+        wide = np.zeros((len(packed), 8), dtype=np.uint8)
+        wide[:, 8 - nbytes:] = packed
+        return wide.view(">u8").ravel().astype(np.uint64)
+
+    raw = packed.tobytes()
+    values = np.empty(len(packed), dtype=object)
+    values[:] = [int.from_bytes(raw[i:i + nbytes], "big") for i in range(0, len(raw), nbytes)]
+    return values
+
+
+def bits_to_uint(bits) -> int:
+    """Convierte todos los bits en un único entero sin signo."""
+    bits = as_bit_array(bits)
+    if len(bits) == 0:
+        return 0
+    return int.from_bytes(_pack_rows(bits, len(bits)).tobytes(), "big")
+
+
+def bytes_to_uints(data: bytes, width: int) -> np.ndarray:
+    """Igual que bits_to_uints, partiendo de bytes empaquetados."""
+    if width % 8 == 0 and width in (8, 16, 32, 64):
+        usable = len(data) - len(data) % (width // 8)
+        return np.frombuffer(data[:usable], dtype=f">u{width // 8}").astype(np.uint64)
+    return bits_to_uints(bytes_to_bits(data), width)
+
+
+def bits_to_floats(bits, width: int = FLOAT_BITS) -> np.ndarray:
+    """
+    Convierte el flujo de bits en floats uniformes en [0, 1) usando width bits por float
+    (53 por defecto: precisión completa de un double). Con width <= 53 la conversión es
+    exacta: cada float es k / 2**width.
+    """
+    if not 0 < width <= FLOAT_BITS:
+        raise ValueError(f"El ancho debe estar entre 1 y {FLOAT_BITS}")
+    return bits_to_uints(bits, width).astype(np.float64) * (2.0 ** -width)
@@ -0,0 +1,82 @@
+"""
+DocString:
+
+Caché en memoria con caducidad (TTL) y tamaño máximo, compartida por los módulos
+que necesitan evitar viajes a MongoDB o trabajo repetido por petición.
+
+    - Expulsión LRU cuando se llena (OrderedDict: mover al final al leer es O(1)).
+    - Cada entrada caduca a los ttl segundos o en el instante que se indique al guardarla.
+    - Contadores de aciertos y fallos para /metrics.
+
+La clase es thread-safe (tiene su propio lock): se usa desde el bucle de eventos y desde
+los hilos del threadpool.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("El tamaño máximo de la caché debe ser mayor que 0")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict() # --> clave -> (valor, instante de caducidad)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado (y lo marca como reciente) o default si no está o ha caducado."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, expires_at: float = None) -> None:
+        """
+        Guarda value. Caduca a los ttl segundos o en expires_at (en la escala de clock)
+        si es antes.
+        """
+        expiry = self.clock() + self.ttl
+        if expires_at is not None:
+            expiry = min(expiry, expires_at)
+        with self._lock:
+            self._data[key] = (value, expiry)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate) -> int:
+        """Borra las entradas cuyo valor cumpla predicate(valor). Devuelve cuántas ha borrado."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
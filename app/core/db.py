@@ -1,6 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.models.user import User
 from bson import ObjectId
+from app.core.metrics import MONGO_SECONDS, CallbackMetric
+from app.core.cache import TTLCache
+from app.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from app.config import MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_CONNECT_TIMEOUT_MS
+from app.config import MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS, MONGO_COMPRESSORS
+from app.config import BULK_USERS_BATCH_SIZE
+from pymongo.errors import BulkWriteError, PyMongoError
+import asyncio
+import time
 
 import os
 
@@ -8,11 +17,76 @@ import os
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DATABASE_NAME = "microservicio"
 
-# Conectar a MongoDB
-client = AsyncIOMotorClient(MONGO_URI)
+# Conectar a MongoDB (el pool y los timeouts salen de app.config; la conexión real se abre en init_db)
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    compressors=MONGO_COMPRESSORS or None,
+)
 db = client[DATABASE_NAME]
 users_collection = db["users"]
 
+# Caché de usuarios delante de get_user: get_current_user la consulta en cada petición autenticada
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+USER_PROJECTION = {"_id": 0, "username": 1, "hashed_password": 1} # --> solo los campos del modelo User
+USER_LIST_PROJECTION = {"hashed_password": 0} # --> los listados nunca devuelven el hash de la contraseña
+_user_invalidations = 0 # --> si cambia mientras se lee de Mongo, lo leído puede estar obsoleto y no se cachea
+
+CallbackMetric("user_cache_hits_total", "Aciertos de la caché de usuarios.", lambda: user_cache.hits, type="counter")
+CallbackMetric("user_cache_misses_total", "Fallos de la caché de usuarios.", lambda: user_cache.misses, type="counter")
+
+
+
+async def init_db() -> dict:
+    """
+    Se llama al arrancar la aplicación (lifespan de app.main):
+    
+        - Crea los índices que necesitan las consultas (username único: todas filtran por él
+          y el listado pagina por él), así cada búsqueda es O(log n) y no un recorrido entero.
+        - Calienta el pool abriendo MONGO_MIN_POOL_SIZE conexiones con un ping antes de que
+          la app empiece a atender peticiones.
+    
+    Si Mongo no está disponible no se impide el arranque (los endpoints de aleatoriedad no lo
+    necesitan): se avisa y las peticiones de usuarios fallarán hasta que vuelva.
+    
+    Returns:
+    
+        dict: segundos de cada paso y error si lo ha habido.
+    """
+    report = {}
+    try:
+        start = time.perf_counter()
+        await users_collection.create_index("username", unique=True, name="username_unique")
+        report["indexes_seconds"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+        report["warmup_seconds"] = time.perf_counter() - start
+        
+    except PyMongoError as e:
+        report["error"] = str(e)
+        print(f"[!] MongoDB no disponible al arrancar: {e}")
+        
+    return report
+
+
+def close_db() -> None:
+    """Cierra el cliente (y su pool de conexiones) al apagar la aplicación."""
+    client.close()
+
+
+def _invalidate_user(*usernames) -> None:
+    """Saca de la caché a los usuarios modificados o borrados (None se ignora)."""
+    global _user_invalidations
+    _user_invalidations += 1
+    for username in usernames:
+        if username is not None:
+            user_cache.pop(username)
 
 
 async def create_user(user: dict):
@@ -20,23 +94,112 @@ async def create_user(user: dict):
     Crea un nuevo usuario en la base de datos con la contraseña hasheada.
     
     """
-    from app.core.security import get_password_hash # --> Evitando importación circular. Menudo dolor de cabeza =(
+    from app.core.security import hash_password # --> Evitando importación circular. Menudo dolor de cabeza =(
     if "password" in user:
-        user["hashed_password"] = get_password_hash(user.pop("password"))  
+        user["hashed_password"] = await hash_password(user.pop("password")) # --> en el pool de bcrypt, no en el bucle
     
-    result = await users_collection.insert_one(user)
+    with MONGO_SECONDS.time(operation="insert_one"):
+        result = await users_collection.insert_one(user)
     
     return str(result.inserted_id)
 
 
+async def create_users_bulk(users: list) -> list:
+    """
+    Alta masiva de usuarios. Las contraseñas se hashean en el pool de procesos y los usuarios
+    se insertan en lotes de BULK_USERS_BATCH_SIZE con insert_many(ordered=False): un duplicado
+    no para el lote, Mongo inserta el resto y devuelve los errores por posición. Mientras se
+    inserta un lote ya se está hasheando el siguiente. Si un lote falla entero (timeout, red,
+    NotPrimary...) sus usuarios quedan como "error" con el mensaje y se sigue con los demás.
+    
+    Argumentos:
+    
+        users(list): diccionarios con username, password y el resto de campos a guardar.
+    
+    Returns:
+    
+        list: un resultado por usuario, en el mismo orden. status es "created" (con user_id),
+              "duplicate" (ya existía o venía repetido en la petición), "invalid" o "error".
+    """
+    from app.core.security import bulk_password_pool # --> Evitando importación circular
+    
+    results = [None] * len(users)
+    pending = [] # --> posiciones de los usuarios válidos, en orden
+    seen = set()
+    for i, user in enumerate(users):
+        username = user.get("username") if isinstance(user, dict) else None
+        if not isinstance(username, str) or not username or not isinstance(user.get("password"), str):
+            results[i] = {"username": username if isinstance(username, str) else None, "status": "invalid",
+                          "detail": "Hacen falta username y password (texto)"}
+        elif username in seen:
+            results[i] = {"username": username, "status": "duplicate", "detail": "Repetido en la petición"}
+        else:
+            seen.add(username)
+            pending.append(i)
+    
+    batches = [pending[i:i + BULK_USERS_BATCH_SIZE] for i in range(0, len(pending), BULK_USERS_BATCH_SIZE)]
+    
+    def hash_batch(batch):
+        return asyncio.ensure_future(bulk_password_pool.hash_all([users[i]["password"] for i in batch]))
+    
+    next_hashes = hash_batch(batches[0]) if batches else None
+    try:
+        for n, batch in enumerate(batches):
+            hashes = await next_hashes
+            next_hashes = hash_batch(batches[n + 1]) if n + 1 < len(batches) else None
+            
+            documents = []
+            for i, hashed in zip(batch, hashes):
+                document = {key: value for key, value in users[i].items() if key != "password"}
+                document["hashed_password"] = hashed
+                documents.append(document)
+            
+            failed = {}
+            try:
+                with MONGO_SECONDS.time(operation="insert_many"):
+                    await users_collection.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            except PyMongoError as e:
+                # --> timeout, red, NotPrimary...: no se sabe qué ha entrado, el lote entero va como error y se sigue con el resto
+                for i, document in zip(batch, documents):
+                    results[i] = {"username": document["username"], "status": "error", "detail": str(e)}
+                continue
+            
+            for position, (i, document) in enumerate(zip(batch, documents)):
+                error = failed.get(position)
+                if error is None:
+                    results[i] = {"username": document["username"], "status": "created", "user_id": str(document["_id"])}
+                elif error.get("code") == 11000:
+                    results[i] = {"username": document["username"], "status": "duplicate", "detail": "El usuario ya existe"}
+                else:
+                    results[i] = {"username": document["username"], "status": "error", "detail": error.get("errmsg")}
+    finally:
+        if next_hashes is not None and not next_hashes.done():
+            next_hashes.cancel() # --> no dejar hasheando un lote que ya no se va a insertar
+    
+    return results
+
+
 async def get_user(username: str) -> User:
     """
-    Recupera un usuario por su nombre de usuario.
+    Recupera un usuario por su nombre de usuario. Primero mira en la caché de usuarios
+    (TTL de USER_CACHE_TTL_SECONDS) y, si no está, lo lee de Mongo con solo los campos
+    del modelo. Los usuarios que no existen no se cachean.
     
     """
-    user_data = await users_collection.find_one({"username": username})
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    
+    invalidations = _user_invalidations
+    with MONGO_SECONDS.time(operation="find_one"):
+        user_data = await users_collection.find_one({"username": username}, USER_PROJECTION)
     if user_data:
-        return User(**user_data)
+        user = User(**user_data)
+        if invalidations == _user_invalidations:
+            user_cache.set(username, user)
+        return user
     
     return None
 
@@ -45,7 +208,10 @@ async def update_user(username: str, updated_data: dict):
     Actualiza la información de un usuario.
     
     """
-    result = await users_collection.update_one({"username": username}, {"$set": updated_data})
+    with MONGO_SECONDS.time(operation="update_one"):
+        result = await users_collection.update_one({"username": username}, {"$set": updated_data})
+    
+    _invalidate_user(username, updated_data.get("username"))
     
     return result.modified_count > 0
 
@@ -54,19 +220,44 @@ async def delete_user(username: str):
     Elimina un usuario de la base de datos.
     
     """
-    result = await users_collection.delete_one({"username": username})
+    with MONGO_SECONDS.time(operation="delete_one"):
+        result = await users_collection.delete_one({"username": username})
+    
+    _invalidate_user(username)
+    from app.core.security import revoke_tokens # --> Evitando importación circular
+    revoke_tokens(username)
     
     return result.deleted_count > 0
 
 
 
-async def list_users():
+async def list_users(after: str = None, limit: int = 100) -> list:
     """
-    Devuelve una lista de todos los usuarios.
+    Devuelve una página de usuarios ordenada por username (paginación por cursor/keyset):
+    los limit siguientes a after, sin hashed_password. Para la página siguiente se pasa
+    como after el username del último usuario devuelto.
     
     """
-    users = await users_collection.find().to_list(100)
+    with MONGO_SECONDS.time(operation="find"):
+        users = await _users_cursor(after).limit(limit).to_list(limit)
     for user in users:
         user["_id"] = str(user["_id"])  # Convertir ObjectId a string, necesario!
         
-    return users
\ No newline at end of file
+    return users
+
+
+async def iter_users(after: str = None, batch_size: int = 500):
+    """
+    Recorre todos los usuarios (desde after) según los va devolviendo el cursor de Mongo,
+    por lotes de batch_size: la memoria usada no depende del número de usuarios.
+    
+    """
+    async for user in _users_cursor(after).batch_size(batch_size):
+        user["_id"] = str(user["_id"])
+        yield user
+
+
+def _users_cursor(after: str = None):
+    # Filtro por rango sobre username (indexado) en lugar de skip: cada página cuesta lo mismo
+    filter = {"username": {"$gt": after}} if after is not None else {}
+    return users_collection.find(filter, USER_LIST_PROJECTION).sort("username", 1)
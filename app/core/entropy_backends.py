@@ -0,0 +1,238 @@
+"""
+DocString:
+
+Backends de entropía intercambiables detrás del buffer global (app.routers.g_buffer).
+
+Todos cumplen el mismo contrato que quantum_engine.sample_bits: sample_bits(shots) devuelve
+un array uint8 de shots*bits_per_shot bits (0/1). Se elige por nombre con ENTROPY_BACKEND:
+
+    - "aer"            : el camino de siempre (circuito H + medida en el AerSimulator compartido).
+    - "aer-stabilizer" : el mismo circuito forzando el método stabilizer de Aer (sin la
+                         detección automática) y lotes de hasta ENTROPY_STABILIZER_MAX_SHOTS shots.
+    - "clifford"       : muestreo directo. H + medida es un circuito de Clifford: su distribución
+                         de salida se conoce exactamente (uniforme sobre un subespacio afín de
+                         F2^n), así que se calcula UNA vez con la tabla de estabilizadores y
+                         después cada lote es vectorizado con NumPy, sin simulador.
+    - "stub"           : bits pseudoaleatorios con semilla fija, solo para tests. get_backend lo
+                         rechaza salvo con ALLOW_INSECURE_ENTROPY=true: con él /keys/* daría
+                         claves deterministas que se repiten en cada arranque.
+
+La aleatoriedad de "aer" y "aer-stabilizer" sale del generador pseudoaleatorio interno de Aer
+(es un simulador) mezclado con os.urandom, porque un job entero sale de una sola semilla de
+~32 bits; "clifford" usa el CSPRNG del sistema (os.urandom) para elegir el punto del
+subespacio. Los tres dan la misma distribución. Rendimiento de cada uno:
+benchmarks/entropy_backends.py.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+from app.config import ENTROPY_MAX_SHOTS, ENTROPY_STABILIZER_MAX_SHOTS, ALLOW_INSECURE_ENTROPY
+from app.core import quantum_engine
+
+
+CLIFFORD_MAX_SHOTS = 1 << 20 # --> ~29 Mbit por lote: el límite real lo pone el hueco del buffer
+
+
+class EntropyBackend:
+
+    name = None
+    bits_per_shot = quantum_engine.NUM_QUBITS
+    max_shots = ENTROPY_MAX_SHOTS
+    production = True # --> False en los que no sirven para claves reales (stub)
+
+    def warm_up(self) -> dict:
+        """Prepara lo que costaría en el primer lote. Devuelve segundos por paso."""
+        return {}
+
+    def sample_bits(self, shots: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def shots_for_deficit(self, missing_bits: int) -> int:
+        """Shots necesarios para cubrir missing_bits bits, acotados a [1, max_shots]."""
+        return max(1, min(self.max_shots, -(-missing_bits // self.bits_per_shot)))
+
+
+class AerBackend(EntropyBackend):
+
+    name = "aer"
+
+    def warm_up(self) -> dict:
+        return quantum_engine.warm_up()
+
+    def sample_bits(self, shots: int) -> np.ndarray:
+        return quantum_engine.sample_bits(shots)
+
+
+class AerStabilizerBackend(AerBackend):
+
+    name = "aer-stabilizer"
+    max_shots = ENTROPY_STABILIZER_MAX_SHOTS
+
+    def sample_bits(self, shots: int) -> np.ndarray:
+        return quantum_engine.sample_bits(shots, method="stabilizer")
+
+
+def _rowsum(x: np.ndarray, z: np.ndarray, r: np.ndarray, h: int, i: int) -> None:
+    """
+    Fila h <- fila i * fila h de la tabla de estabilizadores, con la fase correcta
+    (rowsum de Aaronson-Gottesman, vectorizado sobre los qubits).
+    """
+    x1, z1, x2, z2 = (v.astype(np.int64) for v in (x[i], z[i], x[h], z[h]))
+    g = np.where(x1 & z1, z2 - x2, np.where(x1, z2 * (2 * x2 - 1), np.where(z1, x2 * (1 - 2 * z2), 0)))
+    r[h] = ((2 * int(r[h]) + 2 * int(r[i]) + int(g.sum())) % 4) // 2
+    x[h] ^= x[i]
+    z[h] ^= z[i]
+
+
+class CliffordSampler:
+
+    def __init__(self, circuit):
+        """
+        Calcula la distribución de salida de un circuito de Clifford que empieza en |0...0>
+        y mide todos sus qubits (el qubit i en el bit clásico i).
+
+        La medida en la base Z de un estado estabilizador es uniforme sobre un subespacio
+        afín x0 + span(G): se eliminan las partes X de los estabilizadores (Gauss en F2) y
+        los que quedan solo con Z fijan las ecuaciones z·x = signo.
+        """
+        from qiskit.quantum_info import Clifford
+
+        measures = [(circuit.find_bit(item.qubits[0]).index, circuit.find_bit(item.clbits[0]).index)
+                    for item in circuit.data if item.operation.name == "measure"]
+        if sorted(measures) != [(i, i) for i in range(circuit.num_qubits)]:
+            raise ValueError("El circuito debe medir cada qubit i en el bit clásico i")
+
+        tableau = Clifford(circuit.remove_final_measurements(inplace=False))
+        n = circuit.num_qubits
+        x = tableau.stab_x.astype(np.uint8)
+        z = tableau.stab_z.astype(np.uint8)
+        r = tableau.stab_phase.astype(np.uint8)
+
+        rank = 0
+        for col in range(n):
+            rows = np.flatnonzero(x[rank:, col])
+            if not len(rows):
+                continue
+            pivot = rank + rows[0]
+            x[[rank, pivot]], z[[rank, pivot]], r[[rank, pivot]] = x[[pivot, rank]], z[[pivot, rank]], r[[pivot, rank]]
+            for row in np.flatnonzero(x[:, col]):
+                if row != rank:
+                    _rowsum(x, z, r, row, rank)
+            rank += 1
+
+        self.num_qubits = n
+        self.random_bits = rank # --> bits aleatorios por shot (el resto quedan fijados)
+        self.offset, self.basis = _affine_solutions(z[rank:], r[rank:], n)
+        self._identity = not self.offset.any() and self.basis.shape == (n, n) and (self.basis == np.eye(n, dtype=np.uint8)).all()
+
+    def sample(self, shots: int) -> np.ndarray:
+        """
+        shots medidas independientes, como array uint8 (shots, num_qubits) con el qubit 0 primero.
+        """
+        nbits = shots * self.random_bits
+        r = np.unpackbits(np.frombuffer(os.urandom(-(-nbits // 8)), dtype=np.uint8), count=nbits)
+        r = r.reshape(shots, self.random_bits)
+        if self._identity:
+            return r # --> H en todos los qubits: cada bit medido es un bit aleatorio
+
+        out = np.broadcast_to(self.offset, (shots, self.num_qubits)).copy()
+        for j in range(self.random_bits):
+            out ^= r[:, j, None] & self.basis[j]
+        return out
+
+
+def _affine_solutions(a: np.ndarray, b: np.ndarray, n: int) -> tuple:
+    """
+    Soluciones de a·x = b en F2: (x0, base) con x = x0 + combinación de las filas de base.
+    """
+    a = a.copy()
+    b = b.copy()
+    pivots = []
+    for col in range(n):
+        rows = np.flatnonzero(a[len(pivots):, col])
+        if not len(rows):
+            continue
+        top = len(pivots)
+        pivot = top + rows[0]
+        a[[top, pivot]], b[[top, pivot]] = a[[pivot, top]], b[[pivot, top]]
+        for row in np.flatnonzero(a[:, col]):
+            if row != top:
+                a[row] ^= a[top]
+                b[row] ^= b[top]
+        pivots.append(col)
+
+    offset = np.zeros(n, dtype=np.uint8)
+    offset[pivots] = b[:len(pivots)]
+    free = [col for col in range(n) if col not in pivots]
+    basis = np.zeros((len(free), n), dtype=np.uint8)
+    for j, col in enumerate(free):
+        basis[j, col] = 1
+        basis[j, pivots] = a[:len(pivots), col]
+    return offset, basis
+
+
+class CliffordBackend(EntropyBackend):
+
+    name = "clifford"
+    max_shots = CLIFFORD_MAX_SHOTS
+
+    def __init__(self):
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def _get_sampler(self) -> CliffordSampler:
+        with self._lock:
+            if self._sampler is None:
+                from qiskit import QuantumCircuit
+                qc = QuantumCircuit(self.bits_per_shot, self.bits_per_shot)
+                qc.h(range(self.bits_per_shot))
+                qc.measure(range(self.bits_per_shot), range(self.bits_per_shot))
+                self._sampler = CliffordSampler(qc)
+            return self._sampler
+
+    def warm_up(self) -> dict:
+        start = time.perf_counter()
+        self._get_sampler()
+        return {"clifford_tableau": time.perf_counter() - start}
+
+    def sample_bits(self, shots: int) -> np.ndarray:
+        return self._get_sampler().sample(shots).ravel()
+
+
+class StubBackend(EntropyBackend):
+
+    name = "stub"
+    max_shots = CLIFFORD_MAX_SHOTS
+    production = False
+
+    def __init__(self, seed: int = 0):
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def sample_bits(self, shots: int) -> np.ndarray:
+        with self._lock:
+            return self._rng.integers(0, 2, shots * self.bits_per_shot, dtype=np.uint8)
+
+
+BACKENDS = {backend.name: backend for backend in (AerBackend, AerStabilizerBackend, CliffordBackend, StubBackend)}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: str, allow_insecure: bool = ALLOW_INSECURE_ENTROPY) -> EntropyBackend:
+    """
+    Devuelve el backend name (uno por proceso, creado al primer uso). Crearlo no importa
+    qiskit ni arranca nada: eso pasa en warm_up() o en el primer lote.
+    Los backends con production = False solo se devuelven con allow_insecure.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de entropía desconocido: {name!r} (disponibles: {', '.join(BACKENDS)})")
+    if not BACKENDS[name].production and not allow_insecure:
+        raise ValueError(f"El backend de entropía {name!r} no es seguro para claves reales (solo tests: ALLOW_INSECURE_ENTROPY=true)")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,157 @@
+"""
+DocString:
+
+Reserva de entropía persistente en disco, mapeada en memoria (mmap), para que un
+arranque en caliente no empiece con el buffer vacío.
+
+    - El fichero es un buffer circular de bytes con una cabecera (magic, capacidad,
+      posición de lectura y bytes guardados).
+    - Uso estrictamente único: al consumir una región, PRIMERO se persiste la cabecera
+      que la da por consumida y DESPUÉS se pone a cero. Si el proceso muere entre medias,
+      la región se pierde, pero nunca se vuelve a servir.
+    - Al escribir, primero se persisten los datos y después la cabecera que los publica.
+    - Solo se sincronizan con disco las páginas tocadas (flush de un rango), no el mapa entero.
+      g_buffer llama a write y read SIN el lock del buffer: los flush no bloquean a nadie más.
+    - Un único proceso por fichero: la posición de lectura solo vive en la memoria del proceso,
+      así que dos procesos (uvicorn --workers N, despliegues solapados) servirían la misma
+      región dos veces. Se coge un flock exclusivo y, si otro proceso lo tiene, ReserveLocked.
+
+La clase es thread-safe (tiene su propio lock).
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+
+HEADER = struct.Struct("<8sQQQ") # --> magic, capacidad, posición de lectura, bytes guardados
+MAGIC = b"QRESERV1"
+
+
+class ReserveLocked(RuntimeError):
+    """Otro proceso ya tiene abierta la reserva."""
+
+
+class EntropyReserve:
+
+    def __init__(self, path: str, capacity_bytes: int):
+        """
+        Abre (o crea) el fichero de reserva. Si el fichero no existe, no tiene el
+        formato esperado o su capacidad no coincide, se descarta entero y se empieza
+        con la reserva vacía.
+        """
+        if capacity_bytes <= 0:
+            raise ValueError("La capacidad de la reserva debe ser mayor que 0")
+
+        self.path = path
+        self.capacity = capacity_bytes
+        self._lock = threading.Lock()
+
+        total = HEADER.size + capacity_bytes
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB) # --> antes de mirar o truncar nada
+        except BlockingIOError:
+            os.close(fd)
+            raise ReserveLocked(f"La reserva {path} ya está en uso por otro proceso")
+        try:
+            if os.fstat(fd).st_size != total:
+                os.ftruncate(fd, 0) # --> se descarta el contenido anterior (queda a ceros)
+                os.ftruncate(fd, total)
+            self._map = mmap.mmap(fd, total)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd # --> abierto mientras viva la reserva: cerrarlo suelta el flock
+
+        magic, capacity, head, size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or capacity != capacity_bytes or head >= capacity_bytes or size > capacity_bytes:
+            self._map[HEADER.size:] = bytes(capacity_bytes)
+            head, size = 0, 0
+            self._persist_header(head, size)
+
+        self._head = head
+        self._size = size
+
+    def __len__(self) -> int:
+        """Bytes de entropía guardados y todavía sin servir."""
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def _segments(self, start: int, n: int):
+        first = min(n, self.capacity - start)
+        yield HEADER.size + start, first
+        if n > first:
+            yield HEADER.size, n - first
+
+    def _flush(self, pos: int, length: int) -> None:
+        """Sincroniza con disco solo las páginas de [pos, pos + length)."""
+        start = pos - pos % mmap.ALLOCATIONGRANULARITY # --> flush exige un offset alineado a página
+        self._map.flush(start, pos + length - start)
+
+    def _persist_header(self, head: int, size: int) -> None:
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, head, size)
+        self._map.flush(0, HEADER.size)
+
+    def write(self, data: bytes) -> int:
+        """
+        Guarda data al final de la reserva (lo que no quepa se descarta).
+
+        Returns:
+
+            int: bytes guardados.
+        """
+        with self._lock:
+            n = min(len(data), self.free)
+            if n == 0:
+                return 0
+
+            written = 0
+            for pos, length in self._segments((self._head + self._size) % self.capacity, n):
+                self._map[pos:pos + length] = data[written:written + length]
+                self._flush(pos, length)
+                written += length
+
+            self._size += n
+            self._persist_header(self._head, self._size)
+
+            return n
+
+    def read(self, nbytes: int) -> bytes:
+        """
+        Extrae hasta nbytes bytes del principio de la reserva. Los bytes devueltos
+        quedan consumidos (y borrados del fichero) antes de retornar.
+        """
+        with self._lock:
+            n = min(nbytes, self._size)
+            if n == 0:
+                return b""
+
+            segments = list(self._segments(self._head, n))
+            data = b"".join(self._map[pos:pos + length] for pos, length in segments)
+
+            self._head = (self._head + n) % self.capacity
+            self._size -= n
+            if self._size == 0:
+                self._head = 0
+            self._persist_header(self._head, self._size) # --> 1º se da por consumida...
+
+            for pos, length in segments:
+                self._map[pos:pos + length] = bytes(length) # --> ...y 2º se borra
+                self._flush(pos, length)
+
+            return data
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"path": self.path, "capacity_bytes": self.capacity, "stored_bytes": self._size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
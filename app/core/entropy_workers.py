@@ -0,0 +1,111 @@
+"""
+DocString:
+
+Pool de procesos productores de entropía.
+
+La simulación con Aer es CPU-bound y, en un hilo, compite por el GIL con los hilos que
+sirven peticiones. Aquí cada proceso del pool tiene su propia instancia del backend de
+entropía (app.core.entropy_backends: su AerSimulator y su circuito cacheado, o la tabla
+del muestreador de Clifford), genera lotes grandes de bits y los devuelve ya empaquetados,
+de forma que el proceso principal solo tiene que copiar bytes al buffer.
+
+    - Contadores por worker (pid): jobs, bits producidos y segundos de simulación.
+    - Se usa el contexto "spawn" para no heredar hilos ni estado de OpenMP del padre.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor, Future
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from app.core.metrics import SIMULATOR_JOB_SECONDS
+
+
+def _init_worker(backend_name: str) -> None:
+    """
+    Inicializador de cada proceso: con Aer lo limita a un hilo (el paralelismo lo dan los
+    procesos) y prepara el backend (p.ej. transpila el circuito) antes del primer job.
+    """
+    from app.core import entropy_backends, quantum_engine
+
+    backend = entropy_backends.get_backend(backend_name)
+    if isinstance(backend, entropy_backends.AerBackend):
+        quantum_engine.get_simulator().set_options(max_parallel_threads=1)
+    backend.warm_up()
+
+
+def _produce(backend_name: str, shots: int) -> tuple:
+    """
+    Job que se ejecuta en el proceso hijo.
+
+    Returns:
+
+        tuple: (pid, bytes empaquetados, bits generados, segundos de simulación).
+    """
+    from app.core import entropy_backends
+
+    start = time.perf_counter()
+    bits = entropy_backends.get_backend(backend_name).sample_bits(shots)
+    elapsed = time.perf_counter() - start
+
+    return os.getpid(), np.packbits(bits).tobytes(), len(bits), elapsed
+
+
+class EntropyWorkerPool:
+
+    def __init__(self, workers: int, backend_name: str = "aer"):
+        from app.core.entropy_backends import get_backend
+
+        self.workers = workers
+        self.backend_name = backend_name
+        self.bits_per_shot = get_backend(backend_name).bits_per_shot
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend_name,),
+        )
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def submit(self, shots: int) -> Future:
+        """
+        Encarga un lote de shots disparos a cualquier worker libre. Se redondea el número
+        de shots para que el lote (shots*bits_per_shot bits) ocupe bytes completos.
+        """
+        while shots * self.bits_per_shot % 8:
+            shots += 1
+        return self._executor.submit(_produce, self.backend_name, shots)
+
+    def collect(self, future: Future) -> bytes:
+        """
+        Recoge el resultado de un job terminado, actualiza los contadores del worker
+        que lo ha hecho y devuelve los bytes generados.
+        """
+        pid, data, nbits, elapsed = future.result()
+        SIMULATOR_JOB_SECONDS.observe(elapsed)
+        with self._stats_lock:
+            stats = self._stats.setdefault(pid, {"jobs": 0, "bits": 0, "busy_seconds": 0.0})
+            stats["jobs"] += 1
+            stats["bits"] += nbits
+            stats["busy_seconds"] += elapsed
+
+        return data
+
+    def stats(self) -> dict:
+        """
+        Contadores por worker, con el throughput (bits por segundo de simulación).
+        """
+        with self._stats_lock:
+            return {
+                str(pid): {
+                    **stats,
+                    "bits_per_second": stats["bits"] / stats["busy_seconds"] if stats["busy_seconds"] else 0.0,
+                }
+                for pid, stats in self._stats.items()
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,69 @@
+"""
+DocString:
+
+Formatos de respuesta compactos para los endpoints de aleatoriedad y de claves.
+
+    - json   : el formato histórico de cada endpoint (por defecto).
+    - hex    : {clave: "bytes en hexadecimal"}.
+    - base64 : {clave: "bytes en base64"} (un 33% más compacto que hex).
+    - raw    : los bytes tal cual, como application/octet-stream.
+    - array  : {clave: [valores]} (array JSON compacto, pensado para peticiones por lotes).
+
+Si no se pasa ?format=, se negocia con la cabecera Accept: application/octet-stream -> raw.
+"""
+
+import base64
+from typing import Literal, Optional
+import numpy as np
+from fastapi import Request, Response
+
+
+ResponseFormat = Literal["json", "hex", "base64", "raw", "array"]
+
+OCTET_STREAM = "application/octet-stream"
+
+
+def negotiate_format(request: Request, format: Optional[str]) -> str:
+    """
+    Devuelve el formato pedido explícitamente o, si no hay, el que pida la cabecera Accept.
+    """
+    if format:
+        return format
+    if OCTET_STREAM in request.headers.get("accept", ""):
+        return "raw"
+    return "json"
+
+
+def encode_bytes(data: bytes, format: str, key: str, headers: Optional[dict] = None):
+    """
+    Serializa unos bytes en el formato pedido (todos menos json, que es cosa de cada endpoint).
+    """
+    if format == "raw":
+        return Response(content=data, media_type=OCTET_STREAM, headers=headers)
+    if format == "hex":
+        return {key: data.hex()}
+    if format == "base64":
+        return {key: base64.b64encode(data).decode("ascii")}
+    if format == "array":
+        return {key: list(data)}
+
+    raise ValueError(f"Formato no soportado: {format}")
+
+
+def encode_array(values: np.ndarray, format: str, key: str):
+    """
+    Serializa un array NumPy (enteros o floats). En raw/hex/base64 se usa su representación
+    binaria (little-endian, ancho fijo del dtype) y el dtype va en la cabecera X-Dtype
+    (o en el campo "dtype") para que el cliente pueda decodificarla.
+    """
+    if format in ("json", "array"):
+        return {key: values.tolist()}
+
+    data = values.astype(values.dtype.newbyteorder("<"), copy=False).tobytes()
+    dtype = values.dtype.newbyteorder("<").str
+    if format == "raw":
+        return encode_bytes(data, format, key, headers={"X-Dtype": dtype})
+
+    response = encode_bytes(data, format, key)
+    response["dtype"] = dtype
+    return response
@@ -0,0 +1,201 @@
+"""
+DocString:
+
+Métricas del servicio en el formato de exposición de texto de Prometheus (/metrics),
+sin dependencias externas.
+
+    - Counter, Gauge e Histogram con etiquetas. Cada métrica tiene su propio lock y
+      observar es una búsqueda binaria + dos sumas: se puede dejar activado en producción.
+    - Los histogramas guardan cuentas por cubo sin acumular; se acumulan al exportar.
+    - CallbackMetric lee el valor al exportar (nivel del buffer, bits producidos...),
+      así que no cuesta nada en el camino de las peticiones.
+    - MetricsMiddleware: latencia por ruta (la plantilla de la ruta, no la URL, para no
+      disparar la cardinalidad), método y código de estado. Es ASGI puro.
+
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: list = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple, extra: tuple = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> list:
+        with self._lock:
+            children = list(self._children.items())
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in children]
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(header + self._samples())
+
+
+class Counter(_Metric):
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = value
+
+
+class CallbackMetric(_Metric):
+
+    def __init__(self, name: str, documentation: str, callback, type: str = "gauge", registry: list = REGISTRY):
+        """
+        Métrica sin etiquetas cuyo valor se obtiene llamando a callback() al exportar.
+        """
+        super().__init__(name, documentation, registry=registry)
+        self.callback = callback
+        self.type = type
+
+    def _samples(self) -> list:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class Histogram(_Metric):
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS, registry: list = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value) # --> el último índice es el cubo +Inf
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            child[0][index] += 1
+            child[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa lo que tarda el bloque with (también vale alrededor de un await)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> list:
+        with self._lock:
+            children = [(key, list(counts), total) for key, (counts, total) in self._children.items()]
+
+        lines = []
+        for key, counts, total in children:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels(key, (('le', _format_value(float(bound))),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+def render(registry: list = REGISTRY) -> str:
+    """Exporta todas las métricas registradas en el formato de texto de Prometheus."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+# Métricas compartidas por todo el servicio ------------------------------------------------
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta.", ("method", "route", "status"))
+
+MONGO_SECONDS = Histogram("mongo_operation_duration_seconds", "Latencia de las operaciones con MongoDB (app.core.db).", ("operation",))
+
+SIMULATOR_JOB_SECONDS = Histogram("quantum_simulator_job_duration_seconds", "Duración de cada job del simulador que genera bits para el buffer.")
+
+TRANSPILE_SECONDS = Histogram("quantum_transpile_duration_seconds", "Duración de cada transpilación de circuito.", ("circuit",))
+
+BUFFER_WAIT_SECONDS = Histogram("quantum_buffer_wait_seconds", "Tiempo que tarda un consumidor en obtener sus bits del buffer.", ("mode",))
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route_template(scope), status=status)
+
+
+def route_template(scope) -> str:
+    """
+    Plantilla de la ruta que ha atendido la petición (p.ej. /users/{username}) o "unmatched".
+    Según la versión de FastAPI, route.path lleva o no el prefijo del include_router, así que
+    el prefijo se saca de la URL: son los segmentos que sobran por delante de la plantilla.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[:max(1, len(segments) - template.count("/"))])
+    return prefix + template
@@ -0,0 +1,80 @@
+"""
+DocString:
+
+Hasheo de contraseñas en bloque (alta masiva de usuarios) repartido en un pool de procesos.
+
+    - Las contraseñas se mandan por trozos de HASH_CHUNK_SIZE: un job por trozo, no por
+      contraseña, para que el coste de pasar datos entre procesos no se coma la ganancia.
+    - Los trozos se reparten entre todos los procesos a la vez y el resultado vuelve en
+      el mismo orden que la entrada.
+    - El pool se crea la primera vez que se usa (contexto "spawn", igual que el resto de
+      pools del servicio), así que importar el módulo no arranca procesos.
+
+El pool de hilos de app.core.security sigue siendo el de login y altas sueltas: este es
+solo para los lotes grandes, que no deben quitarle hueco a las peticiones interactivas.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+import threading
+
+
+HASH_CHUNK_SIZE = 8 # --> contraseñas por job (a 12 rondas, ~2 s de CPU por job)
+
+_contexts = {} # --> CryptContext por número de rondas, uno por proceso
+
+
+def hash_chunk(passwords: list, rounds: int) -> list:
+    """Hashea una lista de contraseñas con bcrypt a rounds rondas (se ejecuta en el proceso hijo)."""
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return [context.hash(password) for password in passwords]
+
+
+class PasswordHashPool:
+
+    def __init__(self, workers: int, rounds: int):
+        """
+        workers = 0 usa un proceso por CPU.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.rounds = rounds
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def hash_all(self, passwords: list) -> list:
+        """
+        Hashea todas las contraseñas en paralelo sin bloquear el bucle de eventos.
+
+        Returns:
+
+            list: los hashes, en el mismo orden que passwords.
+        """
+        if not passwords:
+            return []
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        jobs = [
+            loop.run_in_executor(executor, hash_chunk, passwords[i:i + HASH_CHUNK_SIZE], self.rounds)
+            for i in range(0, len(passwords), HASH_CHUNK_SIZE)
+        ]
+        return [hashed for chunk in await asyncio.gather(*jobs) for hashed in chunk]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,230 @@
+"""
+DocString:
+
+Motor de búsqueda de primos grandes a partir de entropía cuántica.
+
+    - Un único candidato cuántico por primo: a partir de él se recorren los impares
+      siguientes (búsqueda incremental), en lugar de sacar bits nuevos del buffer en
+      cada intento fallido.
+    - Criba incremental con los primos pequeños (< SIEVE_LIMIT) sobre una ventana de
+      impares: solo los que sobreviven pasan a Miller-Rabin.
+    - Miller-Rabin con el número de rondas de FIPS 186-4 para el tamaño del primo.
+    - Con workers > 0 los supervivientes se prueban por trozos en un pool de procesos.
+      Siempre se devuelve el PRIMER primo a partir del candidato, igual que en serie.
+
+El motor no sabe de dónde salen los bits: recibe una función random_bytes(n) (el buffer global).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import random
+import threading
+import time
+import numpy as np
+
+
+SIEVE_LIMIT = 65536     # --> se criba con todos los primos impares menores que esto (~6500 primos)
+SIEVE_WINDOW = 4096     # --> impares por ventana de criba
+CHUNK_SIZE = 16         # --> supervivientes por job cuando se usa el pool
+
+
+def _small_primes(limit: int) -> np.ndarray:
+    sieve = np.ones(limit, dtype=bool)
+    sieve[:2] = False
+    for p in range(2, int(limit**0.5) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = False
+    return np.flatnonzero(sieve)
+
+
+SMALL_PRIMES = _small_primes(SIEVE_LIMIT)
+ODD_PRIMES = SMALL_PRIMES[1:]
+
+
+def mr_rounds(bits: int) -> int:
+    """
+    Rondas de Miller-Rabin para candidatos aleatorios de bits bits (FIPS 186-4, tabla C.2):
+    probabilidad de aceptar un compuesto menor que 2**-100.
+    """
+    if bits >= 1536:
+        return 4
+    if bits >= 1024:
+        return 5
+    if bits >= 512:
+        return 7
+    return 40
+
+
+def is_probable_prime(n: int, rounds: int) -> bool:
+    """
+    Test de Miller-Rabin con rounds bases aleatorias. Las bases no tienen que ser
+    secretas, así que salen de random y no del buffer cuántico.
+    """
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES[:25]:
+        if n % int(p) == 0:
+            return n == p
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for _ in range(rounds):
+        x = pow(random.randrange(2, n - 1), d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def sieve_window(start: int, window: int = SIEVE_WINDOW) -> np.ndarray:
+    """
+    Criba los impares start, start+2, ..., start+2*(window-1) (start impar) con los primos
+    pequeños y devuelve los índices i de los que sobreviven (candidato start + 2*i).
+    Si la ventana llega a los propios primos pequeños (start < SIEVE_LIMIT, primos de 16-17
+    bits), cada uno solo tacha sus múltiplos, no a sí mismo.
+    """
+    survivors = np.ones(window, dtype=bool)
+
+    residues = np.array([start % int(p) for p in ODD_PRIMES], dtype=np.int64)
+    # start + 2*i ≡ 0 (mod p)  <=>  i ≡ -start * 2^-1 (mod p), con 2^-1 = (p+1)/2
+    first = (-residues * ((ODD_PRIMES + 1) // 2)) % ODD_PRIMES
+    if start < SIEVE_LIMIT:
+        first = np.where(start + 2 * first == ODD_PRIMES, first + ODD_PRIMES, first) # --> p es primo: se salta
+
+    for p, i in zip(ODD_PRIMES.tolist(), first.tolist()):
+        survivors[i::p] = False
+
+    return np.flatnonzero(survivors)
+
+
+def _test_chunk(start: int, offsets: list, rounds: int) -> tuple:
+    """
+    Job del pool: prueba en orden los candidatos start + 2*i.
+
+    Returns:
+
+        tuple: (primer i que es primo o None, candidatos probados).
+    """
+    for tested, i in enumerate(offsets, 1):
+        if is_probable_prime(start + 2 * i, rounds):
+            return i, tested
+    return None, len(offsets)
+
+
+class PrimeEngine:
+
+    def __init__(self, random_bytes, workers: int = 0):
+        """
+        random_bytes(n) debe devolver n bytes aleatorios (del buffer cuántico).
+        Con workers > 0 las pruebas de Miller-Rabin se reparten en un pool de procesos.
+        """
+        self.random_bytes = random_bytes
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self._totals = {"primes": 0, "candidates_tested": 0, "entropy_bits": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def random_start(self, bits: int) -> int:
+        """
+        Candidato inicial de bits bits: impar y con los dos bits altos a 1, para que el
+        producto de dos primos así tenga exactamente 2*bits bits.
+        """
+        nbytes = (bits + 7) // 8
+        value = int.from_bytes(self.random_bytes(nbytes), "big") >> (8 * nbytes - bits)
+        return value | (0b11 << (bits - 2)) | 1
+
+    def _search_serial(self, start: int, offsets: np.ndarray, rounds: int) -> tuple:
+        return _test_chunk(start, offsets.tolist(), rounds)
+
+    def _search_pool(self, start: int, offsets: np.ndarray, rounds: int) -> tuple:
+        """
+        Reparte los supervivientes en trozos entre los procesos y recoge los resultados en
+        orden: el primer trozo con un primo da el mismo primo que la búsqueda en serie.
+        """
+        chunks = [offsets[i:i + CHUNK_SIZE].tolist() for i in range(0, len(offsets), CHUNK_SIZE)]
+        futures = [self._executor.submit(_test_chunk, start, chunk, rounds) for chunk in chunks]
+        tested = 0
+        try:
+            for future in futures:
+                found, n = future.result()
+                tested += n
+                if found is not None:
+                    return found, tested
+            return None, tested
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def generate_prime(self, bits: int) -> tuple:
+        """
+        Busca el primer primo a partir de un candidato cuántico de bits bits.
+
+        Returns:
+
+            tuple: (primo, estadísticas de la búsqueda: candidatos probados con Miller-Rabin,
+                    enteros recorridos, bits cuánticos gastados y segundos).
+        """
+        if bits < 16:
+            raise ValueError("El primo debe tener al menos 16 bits")
+
+        begin = time.perf_counter()
+        rounds = mr_rounds(bits)
+        search = self._search_pool if self._executor else self._search_serial
+        entropy_bits = 0
+        tested = 0
+        scanned = 0
+        prime = None
+
+        while prime is None:
+            start = self.random_start(bits)
+            entropy_bits += bits
+
+            while start < 2**bits: # --> si la búsqueda se sale de bits bits, candidato nuevo
+                found, n = search(start, sieve_window(start), rounds)
+                tested += n
+                if found is not None:
+                    scanned += found + 1
+                    if start + 2 * found < 2**bits:
+                        prime = start + 2 * found
+                    break
+                scanned += SIEVE_WINDOW
+                start += 2 * SIEVE_WINDOW
+
+        stats = {
+            "bits": bits,
+            "candidates_tested": tested,
+            "candidates_scanned": scanned,
+            "entropy_bits": entropy_bits,
+            "seconds": time.perf_counter() - begin,
+        }
+        with self._lock:
+            self._totals["primes"] += 1
+            self._totals["candidates_tested"] += tested
+            self._totals["entropy_bits"] += entropy_bits
+            self._totals["seconds"] += stats["seconds"]
+
+        return prime, stats
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._totals)
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None # --> lo que llegue después se busca en serie
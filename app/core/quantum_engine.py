@@ -0,0 +1,146 @@
+"""
+DocString:
+
+Motor de generación de bits cuánticos aleatorios por lotes.
+
+    - El circuito de Hadamard + medida se construye y se transpila UNA sola vez y se cachea.
+    - Cada trabajo del simulador se lanza con muchos shots y memory=True, de forma que un
+      único job devuelve miles (o millones) de bits en lugar de 28.
+    - El tamaño del lote se adapta a lo vacío que esté el buffer (ver shots_for_deficit).
+    - Un ÚNICO AerSimulator para todo el proceso (buffer, /keys/seed...), creado la primera
+      vez que se pide. qiskit y qiskit_aer tampoco se importan al cargar el módulo: cuestan
+      más que el resto de la app junta, así que se cargan al primer uso o en warm_up().
+    - Todo un job de Aer sale de UNA semilla de ~32 bits (seed_simulator): con lotes de
+      hasta ENTROPY_MAX_SHOTS*28 bits eso no basta para claves. Por eso cada lote se mezcla
+      (XOR) con bits frescos de os.urandom antes de devolverlo (ver sample_bits).
+
+"""
+
+from functools import lru_cache
+import math
+import os
+import threading
+import time
+import numpy as np
+from app.config import ENTROPY_MAX_SHOTS
+from app.core.metrics import SIMULATOR_JOB_SECONDS, TRANSPILE_SECONDS
+
+# Máximo de qubits que usamos con AER: cada shot aporta NUM_QUBITS bits.
+NUM_QUBITS = 28
+
+_simulator = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator():
+    """
+    Devuelve el AerSimulator compartido del proceso, creándolo (e importando qiskit_aer)
+    la primera vez.
+    """
+    global _simulator
+    if _simulator is None:
+        with _simulator_lock:
+            if _simulator is None:
+                from qiskit_aer import AerSimulator
+                _simulator = AerSimulator()
+    return _simulator
+
+
+def transpile(circuit, label: str = "other"):
+    """
+    Transpila circuit para el simulador compartido. label etiqueta la métrica de duración.
+    """
+    from qiskit import transpile as qiskit_transpile
+    with TRANSPILE_SECONDS.time(circuit=label):
+        return qiskit_transpile(circuit, get_simulator())
+
+
+def run(circuit, **options):
+    """Lanza circuit en el simulador compartido y espera al resultado."""
+    return get_simulator().run(circuit, **options).result()
+
+
+def warm_up() -> dict:
+    """
+    Hace de una vez todo lo que si no pagaría la primera petición: importar qiskit y
+    qiskit_aer, crear el simulador y transpilar el circuito de entropía.
+
+    Returns:
+
+        dict: segundos de cada paso (los pasos ya hechos cuestan ~0).
+    """
+    timings = {}
+    start = time.perf_counter()
+    import qiskit
+    timings["import_qiskit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import qiskit_aer
+    timings["import_qiskit_aer"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_simulator()
+    timings["simulator"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_entropy_circuit()
+    timings["entropy_circuit"] = time.perf_counter() - start
+    return timings
+
+
+@lru_cache(maxsize=None)
+def get_entropy_circuit(num_qubits: int = NUM_QUBITS):
+    """
+    Devuelve el circuito (ya transpilado) que pone num_qubits qubits en superposición
+    y los mide. Se cachea por número de qubits, así que transpile solo se ejecuta la
+    primera vez.
+    """
+    from qiskit import QuantumCircuit
+    qc = QuantumCircuit(num_qubits, num_qubits)
+    for qubit in range(num_qubits):
+        qc.h(qubit)
+        qc.measure(qubit, qubit)
+
+    return transpile(qc, "entropy")
+
+
+def sample_bits(shots: int, num_qubits: int = NUM_QUBITS, **options) -> np.ndarray:
+    """
+    Ejecuta el circuito cacheado con shots disparos en un único job del simulador.
+    options se pasan a simulator.run (p.ej. method="stabilizer").
+
+    La salida del simulador se mezcla con os.urandom: sin eso el lote entero se podría
+    reproducir con la semilla del job (result.results[0].seed_simulator).
+
+    Returns:
+
+        np.ndarray: array uint8 de shots*num_qubits bits (0/1). Dentro de cada shot,
+                    el qubit 0 va primero.
+    """
+    circuit = get_entropy_circuit(num_qubits)
+    with SIMULATOR_JOB_SECONDS.time(): # --> en los procesos del pool cuenta EntropyWorkerPool.collect
+        result = run(circuit, shots=shots, memory=True, **options)
+    memory = result.get_memory()
+    if not memory:
+        raise RuntimeError("El simulador no ha devuelto ninguna medida")
+
+    # Cada entrada de memory es un string de num_qubits caracteres '0'/'1' con el qubit 0
+    # a la derecha. Lo convertimos entero de una vez en lugar de bit a bit.
+    raw = np.frombuffer("".join(memory).encode("ascii"), dtype=np.uint8) - ord("0")
+
+    bits = raw.reshape(len(memory), num_qubits)[:, ::-1].ravel()
+    return bits ^ urandom_bits(len(bits))
+
+
+def urandom_bits(nbits: int) -> np.ndarray:
+    """nbits bits (uint8 0/1) del CSPRNG del sistema."""
+    return np.unpackbits(np.frombuffer(os.urandom(-(-nbits // 8)), dtype=np.uint8), count=nbits)
+
+
+def shots_for_deficit(missing_bits: int, num_qubits: int = NUM_QUBITS) -> int:
+    """
+    Número de shots necesario para cubrir missing_bits bits, acotado a
+    [1, ENTROPY_MAX_SHOTS]. Con el buffer casi lleno se lanzan jobs pequeños y con
+    el buffer vacío jobs grandes.
+    """
+    return max(1, min(ENTROPY_MAX_SHOTS, math.ceil(missing_bits / num_qubits)))
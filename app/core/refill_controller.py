@@ -0,0 +1,106 @@
+"""
+DocString:
+
+Control adaptativo del rellenado del buffer de entropía.
+
+    - Marcas de agua baja/alta: el productor duerme (sin CPU) mientras el buffer esté por
+      encima de la marca baja y, cuando baja de ella, rellena hasta la marca alta.
+    - Medición de las tasas de llenado y vaciado (bits/s, media móvil exponencial).
+    - Tamaño de lote ajustado al ritmo de vaciado: además del hueco hasta la marca alta,
+      se pide lo que se espera que se consuma mientras dura el propio job.
+
+La clase NO es thread-safe: se usa siempre con el lock del buffer cogido.
+"""
+
+import time
+
+
+class RateMeter:
+
+    def __init__(self, window: float = 1.0, alpha: float = 0.3):
+        """
+        Mide una tasa (unidades/segundo) agrupando los eventos en ventanas de window
+        segundos y suavizando cada ventana con una media móvil exponencial de peso alpha.
+        """
+        self.window = window
+        self.alpha = alpha
+        self.total = 0
+        self._rate = 0.0
+        self._count = 0
+        self._start = time.monotonic()
+
+    def add(self, n: int) -> None:
+        self._roll()
+        self._count += n
+        self.total += n
+
+    def rate(self) -> float:
+        self._roll()
+        return self._rate
+
+    def _roll(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._start
+        if elapsed < self.window:
+            return
+
+        # Una ventana larga sin eventos cuenta como una sola ventana con tasa muy baja,
+        # así la tasa cae hacia 0 cuando el servicio está en reposo.
+        self._rate = self.alpha * (self._count / elapsed) + (1 - self.alpha) * self._rate
+        self._count = 0
+        self._start = now
+
+
+class RefillController:
+
+    def __init__(self, capacity: int, low_watermark: float, high_watermark: float):
+        """
+        Las marcas de agua se dan como fracción de la capacidad (0-1).
+        """
+        if not 0 <= low_watermark < high_watermark <= 1:
+            raise ValueError("Las marcas de agua deben cumplir 0 <= baja < alta <= 1")
+
+        self.capacity = capacity
+        self.low = int(capacity * low_watermark)
+        self.high = int(capacity * high_watermark)
+        self.fill = RateMeter()
+        self.drain = RateMeter()
+        self._job_seconds = 0.0 # --> duración media de un job de generación
+
+    def needs_refill(self, level: int) -> bool:
+        return level < self.low
+
+    def is_full(self, level: int) -> bool:
+        return level >= self.high
+
+    def batch_bits(self, level: int) -> int:
+        """
+        Bits a pedir en el siguiente lote: el hueco hasta la marca alta más lo que se
+        vaciará mientras dure el job (según la tasa de vaciado medida).
+        """
+        expected_drain = int(self.drain.rate() * self._job_seconds)
+        return max(0, self.high - level) + expected_drain
+
+    def record_job(self, seconds: float) -> None:
+        self._job_seconds = seconds if not self._job_seconds else 0.3 * seconds + 0.7 * self._job_seconds
+
+    def time_to_empty(self, level: int):
+        """
+        Segundos hasta vaciar el buffer al ritmo actual, o None si se llena más
+        rápido de lo que se vacía.
+        """
+        net_drain = self.drain.rate() - self.fill.rate()
+        if net_drain <= 0:
+            return None
+        return level / net_drain
+
+    def snapshot(self, level: int) -> dict:
+        return {
+            "low_watermark": self.low,
+            "high_watermark": self.high,
+            "fill_rate_bits_per_second": round(self.fill.rate(), 2),
+            "drain_rate_bits_per_second": round(self.drain.rate(), 2),
+            "time_to_empty_seconds": self.time_to_empty(level),
+            "bits_produced": self.fill.total,
+            "bits_consumed": self.drain.total,
+        }
@@ -0,0 +1,106 @@
+"""
+DocString:
+
+Pool de pares de claves RSA precalculados, rellenado en segundo plano.
+
+Generar dos primos grandes en la propia petición tarda segundos, así que un hilo
+daemon mantiene, para cada tamaño de clave, una cola con hasta depth pares ya
+generados (y exportados a PEM). Las peticiones solo hacen un popleft.
+
+    - Cada par se entrega UNA sola vez: se saca de la cola con el lock cogido.
+    - El hilo rellena primero el tamaño con la cola más vacía (en proporción a su
+      profundidad) y duerme, sin gastar CPU, cuando todas están llenas.
+    - Si un tamaño se queda vacío, take() devuelve None y el llamador genera en línea.
+
+El pool no sabe generar claves: recibe una función generate(size) -> par de claves.
+"""
+
+from collections import deque
+import threading
+import time
+
+
+RETRY_SECONDS = 1.0 # --> espera tras un fallo al generar (p.ej. buffer pausado con /buffer/off)
+
+
+def parse_depths(spec: str) -> dict:
+    """
+    Convierte "2048:4,3072:2" en {2048: 4, 3072: 2}.
+    """
+    depths = {}
+    for item in spec.split(","):
+        if item.strip():
+            size, depth = item.split(":")
+            depths[int(size)] = int(depth)
+    return depths
+
+
+class RSAKeyPool:
+
+    def __init__(self, generate, depths: dict):
+        self.generate = generate
+        self.depths = dict(depths)
+        self._pools = {size: deque() for size in depths}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stats = {size: {"generated": 0, "served_from_pool": 0, "served_inline": 0, "seconds": 0.0} for size in depths}
+
+    def __contains__(self, size: int) -> bool:
+        return size in self._pools
+
+    def _next_size(self):
+        """
+        Tamaño a rellenar a continuación (el más vacío en proporción), o None si están todos llenos.
+        """
+        pending = [size for size, depth in self.depths.items() if len(self._pools[size]) < depth]
+        if not pending:
+            return None
+        return min(pending, key=lambda size: (len(self._pools[size]) / self.depths[size], size))
+
+    def _refill(self) -> None:
+        while True:
+            with self._condition:
+                size = self._next_size()
+                while size is None:
+                    self._condition.wait()
+                    size = self._next_size()
+
+            start = time.perf_counter()
+            try:
+                keypair = self.generate(size) # --> fuera del lock: las peticiones siguen sirviéndose
+            except Exception:
+                time.sleep(RETRY_SECONDS)
+                continue
+
+            with self._condition:
+                self._pools[size].append(keypair)
+                self._stats[size]["generated"] += 1
+                self._stats[size]["seconds"] += time.perf_counter() - start
+
+    def start(self) -> None:
+        """Arranca el hilo de relleno si no está ya iniciado."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill, daemon=True)
+            self._thread.start()
+
+    def take(self, size: int):
+        """
+        Saca un par de claves del pool (que ya no volverá a entregarse) o None si está vacío.
+        """
+        with self._condition:
+            pool = self._pools[size]
+            keypair = pool.popleft() if pool else None
+            self._stats[size]["served_from_pool" if keypair else "served_inline"] += 1
+            self._condition.notify()
+            return keypair
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                str(size): {
+                    "available": len(self._pools[size]),
+                    "depth": self.depths[size],
+                    **self._stats[size],
+                }
+                for size in self.depths
+            }
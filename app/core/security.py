@@ -3,19 +3,35 @@ DocString:
 
 En este módulo se definen las funciones de la seguridad de la API.
 
-    - Hasheo de contraseñas usando Bcrypt.
-    - Verificación de las contraseñas
+    - Hasheo de contraseñas usando Bcrypt (coste configurable con BCRYPT_ROUNDS).
+    - Verificación de las contraseñas, con re-hasheo transparente si el hash se hizo con otro coste.
+    - Bcrypt tarda cientos de ms: las versiones async lo ejecutan en un pool de hilos propio
+      (PASSWORD_HASH_CONCURRENCY hilos) para no bloquear el bucle de eventos. Si una operación
+      espera en cola más de PASSWORD_QUEUE_TIMEOUT_SECONDS, se responde 503 en vez de acumular.
     - Creación y validación  de tokens JWT
+    - Caché de tokens ya verificados (por su sha256, hasta su exp): un token repetido no se
+      vuelve a decodificar ni a comprobar su firma. revoke_tokens() la vacía para un usuario
+      borrado o para todos al rotar el secreto (rotate_secret).
     
 """
 from fastapi import Depends, HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.security import OAuth2PasswordBearer
 from app.core.db import get_user # --> Para obtener el usuario de la bbdd
 from app.models.user import User
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from app.config import BCRYPT_ROUNDS, PASSWORD_HASH_CONCURRENCY, PASSWORD_QUEUE_TIMEOUT_SECONDS
+from app.config import TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS
+from app.config import PASSWORD_BULK_WORKERS
+from app.core.cache import TTLCache
+from app.core.password_pool import PasswordHashPool
+from app.core.metrics import CallbackMetric
+import asyncio
+import hashlib
 import jwt
 import os
+import time
 from dotenv import load_dotenv
 
 
@@ -23,7 +39,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Configuracion del haseho de de contraseñas:
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Pool de hilos solo para bcrypt (libera el GIL mientras hashea): limita cuántos hashes van a la vez
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+
+# Pool de procesos para las altas masivas (POST /users/bulk); se arranca al primer uso
+bulk_password_pool = PasswordHashPool(PASSWORD_BULK_WORKERS, BCRYPT_ROUNDS)
 
 # Variables para el uso de JWT
 SECRET_KEY = os.getenv("JWT_SECRET","0a2b3c4d5e6f7g8h9i") # --> si JWT_SECRET no está definida, se usará el segundo paramtro
@@ -34,12 +56,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 25
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Tokens ya verificados: sha256(token) -> username. Cada entrada caduca con el exp del token.
+token_cache = TTLCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS)
+
+CallbackMetric("token_cache_hits_total", "Tokens JWT servidos desde la caché de tokens verificados.", lambda: token_cache.hits, type="counter")
+CallbackMetric("token_cache_misses_total", "Tokens JWT que ha habido que decodificar y verificar.", lambda: token_cache.misses, type="counter")
+
 
 async def get_current_user(token:str = Depends(oauth2_scheme)) -> User:
     
     """
     Esta función obtiene el token desde la peticion. 
-    Luego, decodifica el token JWT usando la SCRET_KEY.
+    Luego, decodifica el token JWT usando la SCRET_KEY (salvo que ya esté en la caché
+    de tokens verificados, que se consulta por el sha256 del token).
     A continuación extrae el username del token y lo busca en la 
     base de datos.
     Si el usuario no existe, o esta invalidado, devuelve un 401.
@@ -60,14 +89,23 @@ async def get_current_user(token:str = Depends(oauth2_scheme)) -> User:
         headers={"WWW-Authenticate":"Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token,SECRET_KEY,algorithms=ALGORITHM)
-        username:str = payload.get("sub")
-        if username is None:
-            raise exception
+    digest = hashlib.sha256(token.encode()).digest()
+    username = token_cache.get(digest)
     
-    except jwt.PyJWKError:
-        raise exception
+    if username is None:
+        try:
+            payload = jwt.decode(token,SECRET_KEY,algorithms=ALGORITHM)
+            username:str = payload.get("sub")
+            if username is None:
+                raise exception
+        
+        except jwt.PyJWTError:
+            raise exception
+        
+        # exp es un timestamp (reloj de pared): se pasa a la escala monotónica de la caché
+        exp = payload.get("exp")
+        expires_at = token_cache.clock() + (exp - time.time()) if exp is not None else None
+        token_cache.set(digest, username, expires_at=expires_at)
     
     user = await get_user(username) #--> desde app.core.db (la función busca el usuario en la BBDD)
     
@@ -76,6 +114,32 @@ async def get_current_user(token:str = Depends(oauth2_scheme)) -> User:
     
     return user
 
+def revoke_tokens(username:str = None) -> int:
+    
+    """
+    Saca de la caché de tokens verificados los de username (o todos si es None), para que
+    la siguiente petición con ellos vuelva a validarse entera.
+    
+    Returns:
+    
+        int: número de tokens que estaban en la caché.
+    """
+    if username is None:
+        revoked = len(token_cache)
+        token_cache.clear()
+        return revoked
+    return token_cache.discard_where(lambda cached: cached == username)
+
+def rotate_secret(new_secret:str) -> None:
+    
+    """
+    Cambia el secreto de firma de los JWT. Los tokens firmados con el anterior dejan de
+    valer en ese mismo momento (también los que estaban en la caché).
+    """
+    global SECRET_KEY
+    SECRET_KEY = new_secret
+    revoke_tokens()
+
 def get_password_hash(password:str) -> str:
     
     """
@@ -110,6 +174,53 @@ def verify_passwords(plain_pass:str,hashed_pass:str) -> bool:
     """
     return pwd_context.verify(plain_pass,hashed_pass)
 
+class PasswordQueueTimeout(Exception):
+    """La operación ha esperado en la cola del pool de bcrypt más de lo permitido."""
+
+
+def _run_before(deadline:float, function, *args):
+    # Se comprueba al SALIR de la cola: si ya no da tiempo, no se gasta CPU en un hash que nadie espera
+    if time.monotonic() > deadline:
+        raise PasswordQueueTimeout()
+    return function(*args)
+
+async def _run_password_job(function, *args):
+    
+    """
+    Ejecuta function(*args) en el pool de bcrypt sin bloquear el bucle de eventos.
+    Si la cola está tan llena que el trabajo no empieza en PASSWORD_QUEUE_TIMEOUT_SECONDS,
+    devuelve un 503 con Retry-After.
+    """
+    deadline = time.monotonic() + PASSWORD_QUEUE_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(password_executor, _run_before, deadline, function, *args)
+    except PasswordQueueTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiadas operaciones con contraseñas en cola, inténtalo de nuevo",
+            headers={"Retry-After": "1"},
+        )
+
+async def hash_password(password:str) -> str:
+    
+    """
+    Versión async de get_password_hash: hashea en el pool de bcrypt.
+    """
+    return await _run_password_job(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_pass:str, hashed_pass:str) -> tuple:
+    
+    """
+    Verifica la contraseña en el pool de bcrypt.
+    
+    Returns:
+    
+        tuple: (bool si coincide, hash nuevo o None). Hay hash nuevo cuando el guardado se
+               hizo con otro coste (BCRYPT_ROUNDS ha cambiado) y hay que actualizarlo.
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_pass, hashed_pass)
+
 def create_access_token(data:dict,expire_time:timedelta = None) -> str:
     
     """
@@ -0,0 +1,39 @@
+"""
+DocString:
+
+Informe de arranque: cuánto cuesta cada fase (imports, warm-up del motor cuántico, MongoDB,
+hilos en segundo plano) hasta que la app está lista para atender peticiones.
+
+    - phase(nombre) mide un bloque with; record() anota tiempos medidos por otro lado.
+    - Cada fase queda en /metrics como app_startup_phase_seconds{phase="..."}.
+    - summary() devuelve el informe en una línea para el log de arranque.
+
+"""
+
+from contextlib import contextmanager
+import time
+from app.core.metrics import Gauge
+
+
+STARTUP_SECONDS = Gauge("app_startup_phase_seconds", "Segundos de cada fase del arranque de la aplicación.", ("phase",))
+
+report = {} # --> fase -> segundos, en el orden en que se han ido midiendo
+
+
+def record(name: str, seconds: float) -> None:
+    report[name] = seconds
+    STARTUP_SECONDS.set(seconds, phase=name)
+
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def summary() -> str:
+    phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in report.items())
+    return f"[+] Arranque en {sum(report.values()):.2f} s ({phases})"
@@ -1,20 +1,67 @@
+import time
+_import_started = time.perf_counter() # --> antes de cualquier import: mide lo que cuesta cargar la app
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from fastapi.responses import FileResponse
-from app.config import MONGO_URI , JWT_SECRET
-from app.routers import auth, users, quantum_random, keys, g_buffer
+from app.config import MONGO_URI , JWT_SECRET, QUANTUM_WARMUP
+from app.routers import auth, users, quantum_random, keys, g_buffer, metrics
+from app.core.metrics import MetricsMiddleware
+from app.core import db, security, startup
+import asyncio
 import os
 
-app = FastAPI(title="Microservicio - API RESTful | FastApi | Mongo DB ATLAS | Oauth2JWT | Qiskit | Docker | Render")
 
-g_buffer.start_buffer_thread() # --> Inicia el Daemon de la carga de buffer en segundo plano
+async def _warm_up_entropy_backend() -> None:
+    with startup.phase("entropy_warmup"):
+        timings = await asyncio.to_thread(g_buffer.entropy_backend.warm_up) # --> en un hilo: no bloquea el bucle
+    for name, seconds in timings.items():
+        startup.record(f"entropy_warmup.{name}", seconds)
+
+
+async def _init_db() -> None:
+    with startup.phase("mongo"):
+        await db.init_db()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque y parada de la aplicación. Antes de atender peticiones:
+    
+        - Warm-up del backend de entropía (con Aer: imports de qiskit, simulador y circuito) y MongoDB
+          (índices y pool), a la vez.
+        - Arranca los daemons del buffer de bits y del pool de claves RSA.
+    
+    Nada de esto pasa al importar app.main, así que importar la app (tests, workers,
+    herramientas) es rápido. Al apagar se cierran el cliente de Mongo y los pools de procesos
+    (hasheo masivo, primos y productores de entropía).
+    """
+    await asyncio.gather(_warm_up_entropy_backend() if QUANTUM_WARMUP else asyncio.sleep(0), _init_db())
+    
+    with startup.phase("background_threads"):
+        g_buffer.start_buffer_thread() # --> Inicia el Daemon de la carga de buffer en segundo plano
+        keys.rsa_pool.start() # --> Inicia el Daemon que precalcula pares de claves RSA
+    print(startup.summary())
+    
+    yield
+    db.close_db()
+    security.bulk_password_pool.shutdown()
+    keys.prime_engine.shutdown()
+    g_buffer.stop_buffer_workers()
+
+
+app = FastAPI(title="Microservicio - API RESTful | FastApi | Mongo DB ATLAS | Oauth2JWT | Qiskit | Docker | Render", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware) # --> latencia por ruta para /metrics
 
 app.include_router(auth.router,prefix="/auth",tags=["Autenticación JWT"])
 app.include_router(users.router,prefix="/users",tags=["CRUD de Usuarios"])
 app.include_router(quantum_random.router,prefix="/random",tags=["Generador de aleatoriedad cuántica (Quantic Number Random Generation)"])
 app.include_router(keys.router,prefix="/keys",tags=["Funciones criptográficas"])
-app.include_router(g_buffer.router,prefix="/buffer",tags=["Buffer cuántico de 6500 QUbits"])
+app.include_router(g_buffer.router,prefix="/buffer",tags=["Buffer cuántico global de bits empaquetados"])
+app.include_router(metrics.router,tags=["Métricas (Prometheus)"]) # --> antes del mount de "/", que se lo tragaría
 
 # Ruta absoluta a la carpeta landing_page dentro de app/
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -26,6 +73,8 @@ app.mount("/statics", StaticFiles(directory="statics"), name="statics")
 
 app.mount("/", StaticFiles(directory=static_dir, html=True), name="landing")
 
+startup.record("imports", time.perf_counter() - _import_started)
+
 
                    
 @app.get("/",summary="Carga el Landing Page.",tags=["Página de inicio"])
@@ -7,9 +7,9 @@ Rutas para autenticación (login y JWT)
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
-from app.core.security import create_access_token, verify_passwords
+from app.core.security import create_access_token, verify_and_update_password
 from app.models.user import User
-from app.core.db import get_user #Función a implementar que busca usuarios en la BBDD de MONGO DB aTLAS
+from app.core.db import get_user, update_user #Función a implementar que busca usuarios en la BBDD de MONGO DB aTLAS
 
 
 
@@ -21,10 +21,13 @@ router = APIRouter()
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Endpoint para iniciar sesion.
+    La verificación con bcrypt se hace fuera del bucle de eventos y, si el hash guardado
+    se hizo con otro coste, se actualiza aprovechando que tenemos la contraseña en claro.
     
     """
     user = await get_user(form_data.username) # -> Buscar el usuario en la BBDD
-    if not user or not verify_passwords(form_data.password,user.hashed_password):
+    valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,6 +36,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             
             )
         
+    if new_hash:
+        await update_user(user.username, {"hashed_password": new_hash})
+        
     access_token_expires = timedelta(minutes=30)
     acces_token = create_access_token(data={"sub":user.username}, expire_time=access_token_expires)
     
@@ -5,81 +5,356 @@ Este Daemon se iniciará desde el landing p.
 """
 
 from fastapi import APIRouter, HTTPException, status, Query
+import asyncio
 import threading
 import time
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
+import numpy as np
+from concurrent.futures import wait, FIRST_COMPLETED
+from app.config import BUFFER_CAPACITY_BITS, ENTROPY_WORKERS, BUFFER_LOW_WATERMARK, BUFFER_HIGH_WATERMARK
+from app.config import ENTROPY_RESERVE_PATH, ENTROPY_RESERVE_BYTES, ENTROPY_BACKEND
+from app.core.bit_buffer import BitRingBuffer
+from app.core.entropy_reserve import EntropyReserve, ReserveLocked
+from app.core.entropy_workers import EntropyWorkerPool
+from app.core.refill_controller import RefillController
+from app.core import bitconv
+from app.core.entropy_backends import get_backend
+from app.core.metrics import CallbackMetric, BUFFER_WAIT_SECONDS
 
 router = APIRouter()
-simulator = AerSimulator()
 
 
 
-# buffer global de bits y uso de lock para concurrencia
+# buffer global de bits (empaquetado en un buffer circular) y uso de lock para concurrencia
 
-global_buffer =[]
+global_buffer = BitRingBuffer(BUFFER_CAPACITY_BITS)
 buffer_lock = threading.Lock()
+buffer_condition = threading.Condition(buffer_lock) # --> los consumidores esperan aquí en lugar de sondear
+_async_waiters = [] # --> (loop, future) de las corrutinas que esperan bits
 
-#Constante para capacidad máxima del buffer:
+#Constante para capacidad máxima del buffer (configurable con BUFFER_CAPACITY_BITS, redondeada a múltiplo de 8):
 
-BUFFER_MAX_CAPACITY = 6500
+BUFFER_MAX_CAPACITY = global_buffer.capacity
+
+# Control del rellenado: marcas de agua y tasas de llenado/vaciado
+refill_controller = RefillController(BUFFER_MAX_CAPACITY, BUFFER_LOW_WATERMARK, BUFFER_HIGH_WATERMARK)
+producer_condition = threading.Condition(buffer_lock) # --> el productor duerme aquí mientras no haya que rellenar
+
+# Reserva persistente en disco: recibe lo que no cabe en el buffer y lo sirve cuando el buffer se queda corto
+def open_reserve(path:str, capacity_bytes:int):
+    """
+    Abre la reserva o devuelve None si no hay ruta o si otro proceso ya la tiene abierta
+    (varios workers de uvicorn, despliegues solapados): así nunca se sirve dos veces.
+    """
+    if not path:
+        return None
+    try:
+        return EntropyReserve(path, capacity_bytes)
+    except ReserveLocked as e:
+        print(f"[!] Reserva de entropía desactivada en este proceso: {e}")
+        return None
+
+entropy_reserve = open_reserve(ENTROPY_RESERVE_PATH, ENTROPY_RESERVE_BYTES)
+
+# Métricas del buffer para /metrics: se leen al exportar, así que no cuestan nada al consumir
+CallbackMetric("quantum_buffer_bits", "Bits disponibles en el buffer global.", lambda: len(global_buffer))
+CallbackMetric("quantum_buffer_capacity_bits", "Capacidad del buffer global en bits.", lambda: BUFFER_MAX_CAPACITY)
+CallbackMetric("quantum_buffer_bits_produced_total", "Bits volcados en el buffer por el productor.", lambda: refill_controller.fill.total, type="counter")
+CallbackMetric("quantum_buffer_bits_consumed_total", "Bits servidos por el buffer a los consumidores.", lambda: refill_controller.drain.total, type="counter")
+CallbackMetric("quantum_reserve_bytes", "Bytes guardados en la reserva en disco.", lambda: len(entropy_reserve) if entropy_reserve else 0)
+
+# De dónde salen los bits (ENTROPY_BACKEND): Aer, Aer stabilizer, muestreo directo de Clifford o stub
+entropy_backend = get_backend(ENTROPY_BACKEND)
 
 # Variables para el manejo del dameon de llenado de buffer
 buffer_thread_started = False
 buffer_thread = None
+worker_pool = None # --> EntropyWorkerPool si ENTROPY_WORKERS > 0
+producer_enabled = True # --> /buffer/off lo pone a False y el productor se pausa
+_refilling = False # --> histéresis: se rellena desde la marca baja hasta la alta
+_demand = 0 # --> bits que necesita el consumidor más exigente que está esperando
+
+# Fallos del backend en el productor: se anotan para /buffer/state y se reintenta con espera creciente
+PRODUCER_RETRY_SECONDS = 0.5 # --> espera tras el primer fallo; se dobla en cada fallo seguido
+PRODUCER_RETRY_MAX_SECONDS = 30.0
+_producer_failures = 0 # --> fallos seguidos (vuelve a 0 con el primer lote bueno)
+_producer_last_error = None # --> {"error": repr, "at": epoch} del último fallo
 
 
 # Funciones de generación dbits aleatorios y uso del buffer
 
-def generate_random_bits():
+def generate_random_bits(shots:int = 1)->np.ndarray:
     
-    num_qubits = 28
+    """
+    Genera shots*bits_per_shot bits aleatorios (28 por shot) en un único lote del
+    backend de entropía configurado (app.core.entropy_backends).
+    Los errores del backend se propagan tal cual: esto corre en el hilo productor,
+    no dentro de una petición, y es el productor quien los anota y reintenta.
+    """
     
-    qc = QuantumCircuit(num_qubits,num_qubits)
+    return entropy_backend.sample_bits(shots)
+
+
+def _producer_failed(error:Exception)->float:
+    """
+    Anota un lote fallido del backend y devuelve cuántos segundos esperar antes de
+    reintentar (backoff exponencial acotado por PRODUCER_RETRY_MAX_SECONDS).
+    """
+    global _producer_failures, _producer_last_error
+    with buffer_lock:
+        _producer_failures += 1
+        _producer_last_error = {"error": repr(error), "at": time.time()}
+        failures = _producer_failures
+    delay = min(PRODUCER_RETRY_MAX_SECONDS, PRODUCER_RETRY_SECONDS * 2 ** (failures - 1))
+    print(f"[g_buffer] Lote de entropía fallido ({failures} seguidos), reintento en {delay:.1f} s: {error!r}")
+    return delay
+
+
+def _producer_recovered()->None:
+    """Un lote ha salido bien: el productor deja de figurar como fallando (con el lock cogido)."""
+    global _producer_failures
+    _producer_failures = 0
+
+
+def refill_buffer(n:int)->None:
+    """
+    Función auxiliar que rellena el buffer de forma síncrona, agregando n lotes
+    de bits (cada lote son 28 bits, porque usamos un circuito cuántico con el máximo
+    de qubits permitidos con AER(28 qubits). Cada qubit genera un bit aleatorio.).
+    Los n lotes se generan en un solo job de n shots.
+    """
     
-    for qubit in range(num_qubits):
-        qc.h(qubit)
-        qc.measure(qubit,qubit)
-        
+    bits = generate_random_bits(n) # --> la simulación se hace fuera del lock
+    with buffer_lock:
+        global_buffer.clear()
+    commit_bits(bits)
+
+
+def commit_bits(bits)->int:
+    """
+    Vuelca en el buffer los bits ya generados y despierta a los consumidores que
+    estén esperando (hilos con la condición y corrutinas con sus futures).
+    Es la ÚNICA parte del productor que se hace con el lock cogido.
+    Lo que no cabe en el buffer va a la reserva en disco (si está activada).
     
-        
-    traspiled_qc = transpile(qc,simulator)
-    result = simulator.run(traspiled_qc,shots=1).result()
-    counts = result.get_counts()
+    Returns:
     
-    try:
-        bits_str = next(iter(counts))
+        int: número de bits que han cabido en el buffer.
+    """
     
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="No se encontraron los Qubits")
+    bits = np.asarray(bits, dtype=np.uint8)
+    written = _commit(global_buffer.write_bits, bits)
+    if written < len(bits):
+        _spill_to_reserve(bits[written:])
+    return written
+
+
+def commit_bytes(data:bytes)->int:
+    """
+    Igual que commit_bits pero con bits ya empaquetados (lo que devuelven los
+    procesos del pool). Si el buffer está alineado es una copia de memoria.
+    """
     
-    return [int(b) for b in bits_str[::-1]]
+    written = _commit(global_buffer.write_bytes, data)
+    if written < len(data) * 8:
+        _spill_to_reserve(bitconv.bytes_to_bits(data)[written:])
+    return written
 
 
-def refill_buffer(n:int)->None:
+def _commit(write, data)->int:
+    global _demand
+    with buffer_condition:
+        written = write(data)
+        refill_controller.fill.add(written)
+        _demand = 0 # --> los que sigan sin tener bastante la vuelven a anotar al despertar
+        _wake_consumers()
+        
+    return written
+
+
+def _spill_to_reserve(bits:np.ndarray)->None:
     """
-    Función auxiliar que rellena el buffer de forma síncrona, agregando n lotes
-    de bits (cada lote son 28 bits, porque usamos un circuito cuántico con el máximo
-    de qubits permitidos con AER(28 qubits). Cada qubit genera un bit aleatorio.).
+    Guarda en la reserva en disco los bits sobrantes (solo bytes completos). Se hace
+    fuera del lock del buffer: la reserva tiene el suyo.
     """
+    if entropy_reserve is None:
+        return
+    whole = len(bits) - len(bits) % 8
+    if whole:
+        entropy_reserve.write(bitconv.bits_to_bytes(bits[:whole]))
+
+
+def _reserve_shortfall(remaining:int, unit:int)->int:
+    """
+    Bits que faltan en el buffer para el siguiente tramo de un consumidor y que podría
+    cubrir la reserva (0 si no hay reserva o está vacía). Se llama con el lock cogido.
+    """
+    if entropy_reserve is None or not len(entropy_reserve):
+        return 0
+    needed = min(remaining, BUFFER_MAX_CAPACITY // unit) * unit
+    return max(0, needed - len(global_buffer))
+
+
+def _pull_from_reserve(nbits:int)->bool:
+    """
+    Pasa de la reserva al buffer los bytes necesarios para cubrir nbits que faltan
+    (acotado al hueco libre). Lo que sale de la reserva queda consumido en disco.
+    Se llama SIN el lock del buffer: la lectura sincroniza con disco y no debe parar a
+    los demás consumidores ni al productor; el lock solo se coge para volcar los bytes.
     
-    global global_buffer
-    global_buffer = generate_random_bits()
-    for i in range(n-1):
-        global_buffer.extend(generate_random_bits()) # .extend extiende la [lista] como unica, .append anida [listas],[listas].
+    Returns:
+    
+        bool: True si ha volcado algo en el buffer.
+    """
+    with buffer_lock:
+        room = global_buffer.free // 8
+    data = entropy_reserve.read(min(-(-nbits // 8), room))
+    if not data:
+        return False
+    with buffer_condition:
+        written = global_buffer.write_bytes(data)
+        _wake_consumers()
+    if written < len(data) * 8:
+        _spill_to_reserve(bitconv.bytes_to_bits(data)[written:]) # --> el productor ha llenado entretanto: lo que sobra vuelve
+    return True
+
+
+def _pull_unlocked(nbits:int)->bool:
+    """_pull_from_reserve desde un hilo que tiene el lock del buffer: lo suelta mientras tanto."""
+    buffer_lock.release()
+    try:
+        return _pull_from_reserve(nbits)
+    finally:
+        buffer_lock.acquire()
+
+
+def _wake_consumers()->None:
+    """
+    Despierta a todos los consumidores que esperan (hilos y corrutinas). Se llama con
+    el lock cogido.
+    """
+    buffer_condition.notify_all()
+    for loop, future in _async_waiters:
+        loop.call_soon_threadsafe(_wake_future, future)
+    _async_waiters.clear()
+
+
+def _wake_future(future)->None:
+    if not future.done(): # --> la corrutina puede haberse cancelado mientras esperaba
+        future.set_result(None)
+
+        
+def _producer_has_work()->bool:
+    """
+    Decide (con el lock cogido) si el productor debe generar: empieza a rellenar al
+    bajar de la marca baja (o si hay un consumidor esperando más de lo que hay) y
+    no para hasta llegar a la alta.
+    """
+    global _refilling
+    level = len(global_buffer)
+    if refill_controller.needs_refill(level) or level < _demand:
+        _refilling = True
+    elif refill_controller.is_full(level):
+        _refilling = False
+        
+    return producer_enabled and (_refilling or _reserve_has_room())
+
+
+def _reserve_has_room()->bool:
+    return entropy_reserve is not None and entropy_reserve.free > 0
+
+
+def _batch_bits()->int:
+    """
+    Bits a pedir en el siguiente lote (con el lock cogido): si el buffer está
+    rellenando, lo que diga el controlador; si no, lo que falte en la reserva.
+    """
+    if _refilling:
+        level = len(global_buffer)
+        return max(refill_controller.batch_bits(level), _demand - level)
+    return global_buffer.free + entropy_reserve.free * 8
+
         
 def background_buffer_filler():
     """
-    Hilo en segundo plano para rellenar el buffer hasta su máximo.
-    Se ejecuta de forma continua en segundo plano.
+    Hilo en segundo plano para rellenar el buffer entre sus marcas de agua.
+    Mientras no haya que rellenar (o el buffer esté detenido) duerme en
+    producer_condition sin gastar CPU; lo despiertan los consumidores y /buffer/on.
+    La simulación se hace sin el lock: los consumidores solo esperan al volcado.
+    Un fallo del backend no mata el hilo: se anota y se reintenta (fill_once).
     
     """     
     while True:
-        with buffer_lock:
-            if len(global_buffer) < BUFFER_MAX_CAPACITY:
-                #Si es asi añadimos un lote de 28 bits ( 1 shoot del qc )
-                global_buffer.extend(generate_random_bits())  
-        time.sleep(0.1) # Esto es una micro pausa con el objetivo de nos aturar la CPU
+        with producer_condition:
+            producer_condition.wait_for(_producer_has_work)
+            missing = _batch_bits()
+            
+        fill_once(missing)
+
+
+def fill_once(missing:int)->bool:
+    """
+    Un lote del productor: genera (sin el lock) tantos shots como pida el controlador
+    (hueco + lo que se vacía durante el job, acotado por ENTROPY_MAX_SHOTS) y los vuelca.
+    Si el backend falla, anota el error, espera el backoff y devuelve False: el hilo
+    sigue vivo y vuelve a intentarlo en la siguiente vuelta.
+    """
+    start = time.perf_counter()
+    try:
+        bits = generate_random_bits(entropy_backend.shots_for_deficit(missing))
+    except Exception as e:
+        time.sleep(_producer_failed(e))
+        return False
+    with buffer_lock:
+        refill_controller.record_job(time.perf_counter() - start)
+        _producer_recovered()
+    commit_bits(bits)
+    return True
+        
+
+def background_pool_filler():
+    """
+    Hilo en segundo plano que reparte el llenado del buffer entre los procesos del
+    pool. Mantiene como mucho un job en vuelo por worker, cada uno con una parte
+    del lote que pide el controlador, y solo toca el buffer para volcar los bytes
+    que llegan. Sin jobs en vuelo y sin nada que rellenar, duerme como el filler normal.
+    
+    """
+    in_flight = {} # --> future -> (bits que aportará, instante de envío)
+    
+    while True:
+        with producer_condition:
+            if not in_flight:
+                producer_condition.wait_for(_producer_has_work)
+            missing = 0
+            if _producer_has_work():
+                missing = _batch_bits() - sum(bits for bits, _ in in_flight.values())
+            
+        free_slots = worker_pool.workers - len(in_flight)
+        while missing > 0 and free_slots > 0:
+            shots = entropy_backend.shots_for_deficit(-(-missing // free_slots))
+            try:
+                future = worker_pool.submit(shots)
+            except RuntimeError:
+                return # --> el pool se ha cerrado (apagado del proceso)
+            in_flight[future] = (shots * entropy_backend.bits_per_shot, time.perf_counter())
+            missing -= in_flight[future][0]
+            free_slots -= 1
+            
+        done, _ = wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+        retry_delay = 0
+        for future in done:
+            _, submitted_at = in_flight.pop(future)
+            try:
+                data = worker_pool.collect(future)
+            except Exception as e:
+                retry_delay = _producer_failed(e) # --> el lote se pierde y se vuelve a encargar tras la espera
+                continue
+            with buffer_lock:
+                refill_controller.record_job(time.perf_counter() - submitted_at)
+                _producer_recovered()
+            commit_bytes(data)
+        if retry_delay:
+            time.sleep(retry_delay) # --> los jobs que sigan en vuelo se recogen a la vuelta
         
 #Aqui iniciamos el hilo de backgound_buffer_filler() como un dameon para que corra en segundo plano:
 #buffer_thread = threading.Thread(target=backgorund_buffer_filler, daemon = True)
@@ -88,82 +363,294 @@ def background_buffer_filler():
 def start_buffer_thread():
     """
     Arranca el hilo de llenado del buffer si no está ya iniciado.
-    Esta función se llamará desde el endpoint de la landing page.
+    Se llama desde el lifespan de app.main (al arrancar, no al importar).
+    Con ENTROPY_WORKERS > 0 el hilo solo reparte el trabajo entre los procesos del pool.
     """
-    global buffer_thread_started, buffer_thread
+    global buffer_thread_started, buffer_thread, worker_pool
     if not buffer_thread_started:
-        buffer_thread = threading.Thread(target=background_buffer_filler, daemon=True)
+        target = background_buffer_filler
+        if ENTROPY_WORKERS > 0:
+            worker_pool = EntropyWorkerPool(ENTROPY_WORKERS, entropy_backend.name)
+            target = background_pool_filler
+        buffer_thread = threading.Thread(target=target, daemon=True)
+        buffer_thread_started = True # --> antes de start(): /buffer/state no debe verlo "sin arrancar" mientras ya produce
         buffer_thread.start()
-        buffer_thread_started = True
         
         
+def stop_buffer_workers():
+    """
+    Cierra el pool de procesos productores (si lo hay). Se llama al apagar la aplicación;
+    el hilo de llenado termina solo al ver el pool cerrado (submit lanza RuntimeError).
+    """
+    if worker_pool is not None:
+        worker_pool.shutdown()
+        
+        
+# Consumidores: versión síncrona (hilos) y asíncrona (corrutinas) ---------------------------
+
+def _available(unit:int)->int:
+    return len(global_buffer) // unit
+
+
+def _consumed(nbits:int)->None:
+    """
+    Anota lo consumido (tasa de vaciado) y, si el buffer ha bajado de la marca baja,
+    despierta al productor. Se llama con el lock cogido.
+    """
+    refill_controller.drain.add(nbits)
+    if refill_controller.needs_refill(len(global_buffer)):
+        producer_condition.notify()
+
+
+def _buffer_stopped():
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,detail="El buffer está detenido y no tiene bits suficientes")
+
+
+def check_can_serve(nbits:int)->None:
+    """
+    Lanza el 503 de buffer detenido si, sin productor, lo que hay en el buffer y en la
+    reserva no llega a nbits. Sirve para respuestas en streaming, que tienen que fallar
+    ANTES de mandar las cabeceras.
+    """
+    with buffer_lock:
+        stored = len(global_buffer) + (len(entropy_reserve) * 8 if entropy_reserve else 0)
+        if not producer_enabled and stored < nbits:
+            raise _buffer_stopped()
+
+
+def _enough(remaining:int, unit:int)->bool:
+    """
+    Hay suficiente en el buffer para servir el siguiente tramo. Si lo pedido supera
+    la capacidad, basta con que el buffer esté lleno: se sirve en varios tramos.
+    """
+    global _demand
+    needed = min(remaining, BUFFER_MAX_CAPACITY // unit)
+    if _available(unit) >= needed:
+        return True
+    
+    # Hay que esperar: aunque el buffer esté por encima de la marca baja, el productor
+    # tiene que generar al menos lo que pide este consumidor.
+    _demand = max(_demand, needed * unit)
+    producer_condition.notify()
+    return False
+
+
+def _wait_for_bits(remaining:int, unit:int)->None:
+    """
+    Con el lock cogido: espera a que haya bastante para el siguiente tramo (o a que se
+    detenga el productor). Antes de cada espera intenta cubrir el hueco con la reserva.
+    """
+    while True:
+        shortfall = _reserve_shortfall(remaining, unit)
+        if shortfall and _pull_unlocked(shortfall):
+            continue
+        if _enough(remaining, unit) or not producer_enabled:
+            return
+        buffer_condition.wait()
+
+
+def _draw(n:int, unit:int, read)->list:
+    """
+    Extrae n unidades (de unit bits) esperando en la condición del buffer, sin
+    sondear. read(k) lee k unidades del buffer con el lock ya cogido.
+    """
+    start = time.perf_counter()
+    parts = []
+    remaining = n
+    
+    with buffer_condition:
+        while remaining > 0:
+            _wait_for_bits(remaining, unit)
+            if not producer_enabled and _available(unit) < remaining:
+                raise _buffer_stopped() # --> sin productor no se va a completar: no consumimos nada más
+            take = min(remaining, _available(unit))
+            parts.append(read(take)) #-> lectura O(n) sin copiar el resto del buffer
+            remaining -= take
+            _consumed(take * unit)
+            
+    BUFFER_WAIT_SECONDS.observe(time.perf_counter() - start, mode="sync")
+    return parts
+
+
+async def _adraw(n:int, unit:int, read)->list:
+    """
+    Igual que _draw pero para corrutinas: en lugar de bloquear un hilo del threadpool,
+    registra un future que el productor resuelve en commit_bits.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    parts = []
+    remaining = n
+    
+    while remaining > 0:
+        with buffer_lock:
+            shortfall = _reserve_shortfall(remaining, unit)
+        if shortfall and await asyncio.to_thread(_pull_from_reserve, shortfall): # --> disco: fuera del lock y del bucle de eventos
+            continue
+        with buffer_lock:
+            ready = _enough(remaining, unit)
+            if not producer_enabled and _available(unit) < remaining:
+                raise _buffer_stopped()
+            if ready:
+                take = min(remaining, _available(unit))
+                parts.append(read(take))
+                remaining -= take
+                _consumed(take * unit)
+                continue
+            future = loop.create_future()
+            _async_waiters.append((loop, future))
+        await future
         
+    BUFFER_WAIT_SECONDS.observe(time.perf_counter() - start, mode="async")
+    return parts
+
+
+def _join_bits(parts:list)->np.ndarray:
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+
+def get_bit_array_from_buffer(n:int)->np.ndarray:
+    
+    """
+    Extrae n bits del buffer global como array NumPy uint8 (0/1), listo para las
+    conversiones vectorizadas de app.core.bitconv. Si no hay suficientes bits,
+    espera (en la condición del buffer, sin sondear) hasta que se llenen.
+    Si n es mayor que la capacidad del buffer, se extraen en varios tramos.
+    """
+
+    return _join_bits(_draw(n, 1, global_buffer.read_bits))
+
+
 def get_bits_from_buffer(n:int)->list:
     
     """
-    Extrae n bits del buffer global. Si no hay suficientes bits,
-    espera (bloqueando brevemente) hasta que se llenen.
+    Extrae n bits del buffer global como lista de ints (0/1).
+    Espera igual que get_bit_array_from_buffer.
     """
 
+    return get_bit_array_from_buffer(n).tolist()
+
+
+def get_bytes_from_buffer(nbytes:int)->bytes:
     
+    """
+    Extrae nbytes bytes (8*nbytes bits) del buffer global ya empaquetados, sin
+    construir un int de Python por cada bit. Espera igual que get_bits_from_buffer.
+    """
+
+    return b"".join(_draw(nbytes, 8, global_buffer.read_bytes))
+
+
+async def aget_bit_array_from_buffer(n:int)->np.ndarray:
     
-    global global_buffer #-> para acceder a global buffer
+    """
+    Versión asíncrona de get_bit_array_from_buffer para endpoints async def.
+    """
+
+    return _join_bits(await _adraw(n, 1, global_buffer.read_bits))
+
+
+async def aget_bits_from_buffer(n:int)->list:
     
+    """
+    Versión asíncrona de get_bits_from_buffer para endpoints async def.
+    """
+
+    return (await aget_bit_array_from_buffer(n)).tolist()
+
+
+async def aget_packed_bits_from_buffer(n:int)->bytes:
     
-    while True:
-        
-        with buffer_lock:
-            if len(global_buffer) >= n:
-                
-                 bits = global_buffer[:n] #-> rebanada para obtener el n de bits del principio hasta el numero indicado
-                 global_buffer = global_buffer[n:] # ->  modificados el buffer para quitar de el los numeros que he os sacado.
-        
-                 return bits
-             
-        time.sleep(0.01) #Espera un poquito y vuelve a comprobar
+    """
+    Extrae n bits del buffer y los devuelve empaquetados (8 por byte, el último
+    byte relleno con ceros si n no es múltiplo de 8), sin pasar por ints de Python.
+    Los bytes completos salen tal cual del buffer empaquetado; solo se desempaquetan
+    los n % 8 bits del último byte.
+    """
+
+    whole, tail = divmod(max(n, 0), 8)
+    data = await aget_bytes_from_buffer(whole) if whole else b""
+    if tail:
+        data += bitconv.bits_to_bytes(await aget_bit_array_from_buffer(tail))
+    return data
+
+
+async def aget_bytes_from_buffer(nbytes:int)->bytes:
+    
+    """
+    Versión asíncrona de get_bytes_from_buffer para endpoints async def.
+    """
+
+    return b"".join(await _adraw(nbytes, 8, global_buffer.read_bytes))
 
 
 # Funciones / operaciones de endpoints
 
 @router.get("/test",summary="Test de prueba de funcionamiento del buffer. Devuelve Bytes en hexadecimal.")
-def get_random_bytes(size: int = Query(8)):
+async def get_random_bytes(size: int = Query(8)):
     
     """
     Devuelve una sewcuencia de bytes aleatorios en hexadecimal haciendo uso delk buffer
     
     """
     
-    total_bits = size * 8
-    bits = []
     test = False
     
-    # Ahora recolectamos bits hasta alcanzar la cantidad requerida
-    
-    while len(bits) < total_bits:
-        bits.extend(get_bits_from_buffer(total_bits - len(bits)))
-        
-    # Ahora convertimos los bits a bytes
+    # Los bytes salen ya empaquetados del buffer
     
-    byte_array = [int("".join(map(str, bits[i:i+8])), 2) for i in range(0, len(bits), 8)]
+    byte_array = await aget_bytes_from_buffer(size)
     
     if byte_array:
         test = True
     
-    return {"tets_random_bytes": bytes(byte_array).hex()},{"Buffer funcionando correctamente":test}
+    return {"tets_random_bytes": byte_array.hex()},{"Buffer funcionando correctamente":test}
+
+def _producer_state()->str:
+    if not buffer_thread_started:
+        return "sin arrancar"
+    if not producer_enabled:
+        return "detenido"
+    if _producer_failures:
+        return "fallando"
+    return "rellenando" if _refilling else "en reposo"
+
 
 @router.get("/state",summary="Devuelve el estado del buffer")
 def info():
    
+    """
+    Devuelve el nivel del buffer, el estado del productor, las tasas de llenado y
+    vaciado (bits/s), el tiempo estimado hasta vaciarse y los contadores de los workers.
+    Si el backend está fallando, el productor aparece como "fallando" junto al último error.
+    """
 
-    from app.routers.g_buffer import global_buffer, buffer_lock
     with buffer_lock:
         current_buffer_length = len(global_buffer)
-    return {"buffer_length": current_buffer_length}
+        state = {
+            "buffer_length": current_buffer_length,
+            "buffer_capacity": BUFFER_MAX_CAPACITY,
+            "backend": entropy_backend.name,
+            "producer": _producer_state(),
+            "producer_failures": _producer_failures,
+            "producer_last_error": _producer_last_error,
+            **refill_controller.snapshot(current_buffer_length),
+        }
+    state["workers"] = worker_pool.stats() if worker_pool else {}
+    state["reserve"] = entropy_reserve.snapshot() if entropy_reserve else None
+    return state
 
 
 @router.get("/on",summary="Inicializa el buffer")
 def on()->dict:
     
+    """
+    Arranca el productor (si no lo estaba) o lo reanuda tras un /buffer/off.
+    """
+    
+    global producer_enabled
+    with buffer_lock:
+        producer_enabled = True
+        producer_condition.notify_all()
     start_buffer_thread()
     
     return {"Estado del buffer: Activado": True}
@@ -171,7 +658,17 @@ def on()->dict:
 @router.get("/off",summary="Detiene el buffer")
 def off()->dict:
     
-    buffer_stop_event = threading.Event()
+    """
+    Pausa el productor: deja de generar (los jobs en curso terminan y se vuelcan) y
+    el buffer solo sirve los bits que ya tiene. Las peticiones que no puedan
+    servirse reciben un 503 en lugar de quedarse esperando.
+    """
+    
+    global producer_enabled
+    with buffer_lock:
+        producer_enabled = False
+        producer_condition.notify_all()
+        _wake_consumers()
     return {"Estado del buffer: Detenido": False}
 
 
@@ -180,12 +677,12 @@ if __name__ == "__main__":
     
     start_buffer_thread()
     # Puedes probar llenando el buffer y extrayendo algunos bits
-    print("Buffer inicial:", global_buffer)
+    print("Buffer inicial:", len(global_buffer))
     time.sleep(1)  # Espera un segundo para que el background thread haga su trabajo
     bits = get_bits_from_buffer(50)
     print("Bits extraídos (50):", bits)
     print("Buffer restante:", len(global_buffer))
     time.sleep(15) #esperamos 30 segundos
-    print("buffer final despues de 30 segundos",global_buffer)
+    print("buffer final despues de 30 segundos",len(global_buffer))
     print(f"el número de bits en la fase final del buffer + 15sec es de {len(global_buffer)}")
      
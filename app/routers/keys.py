@@ -11,19 +11,26 @@ criptográficos.
 
 
 
-from fastapi import APIRouter, HTTPException, status, Query
-from .g_buffer import get_bits_from_buffer
-from qiskit import QuantumCircuit, transpile, QuantumRegister, ClassicalRegister
-from qiskit_aer import AerSimulator #Borrar si no se usa!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-from qiskit.circuit.library import QFT
-import sympy
-from Crypto.PublicKey import RSA
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from typing import Optional
+from functools import lru_cache
+from app.config import SEED_TEMPLATE_CACHE_SIZE, PRIME_WORKERS, RSA_POOL_DEPTHS
+from app.core.primes import PrimeEngine
+from app.core.rsa_pool import RSAKeyPool, parse_depths
+from app.core import quantum_engine
+from app.core.formats import ResponseFormat, negotiate_format, encode_bytes
+from .g_buffer import get_bits_from_buffer, get_bytes_from_buffer, aget_bytes_from_buffer
 import numpy as np
+import math
 import random
 
 
 router = APIRouter()
-simulator = AerSimulator()
+# qiskit y Crypto se importan dentro de las funciones que los usan (arranque rápido); el simulador es el compartido de quantum_engine
+prime_engine = PrimeEngine(get_bytes_from_buffer, PRIME_WORKERS) # --> primos a partir de un candidato cuántico + criba + Miller-Rabin
+
+RSA_KEY_SIZES = (2048, 3072, 4096)
+RSA_PUBLIC_EXPONENT = 65537
 
 #==============================================================================================================================================================================
 
@@ -45,37 +52,58 @@ def generate_qiskit_bytes(size: int):
     Genera una cantidad de bytes aleatorios usando qubits en superposición.
     
     """
-    total_bits = size * 8
-    bits = get_bits_from_buffer(total_bits)
-    byte_array = [
-        
-        int("".join(map(str,bits[i:i+8])),2)
-        for i in range(0,total_bits,8)
-    ]
-
-    return bytes(byte_array)
+    return get_bytes_from_buffer(size)
 
 def generate_qiskit_prime(bits: int):
     """
     
-    Genera un número primo usando la libreria de qiskit.
+    Genera un número primo de bits bits a partir de un único candidato cuántico
+    (ver app.core.primes: criba incremental + Miller-Rabin).
+    
+    """
+    prime, _ = prime_engine.generate_prime(bits)
+    return prime
+
+def generate_rsa_keypair(size: int) -> dict:
+    """
+    
+    Genera un par de claves RSA de size bits con dos primos cuánticos de size/2 bits,
+    ya exportadas a PEM.
     
     """
-    while True:
-        candidate = int.from_bytes(generate_qiskit_bytes(bits // 8), byteorder="big") | 1 
-        if sympy.isprime(candidate):
-            return candidate
+    e = RSA_PUBLIC_EXPONENT
+    p = generate_qiskit_prime(size // 2)
+    q = generate_qiskit_prime(size // 2)
+    while p == q or math.gcd(e, (p - 1) * (q - 1)) != 1:
+        q = generate_qiskit_prime(size // 2)
+    
+    from Crypto.PublicKey import RSA
+    d = pow(e, -1, math.lcm(p - 1, q - 1))
+    key = RSA.construct((p * q, e, d, p, q))
+    return {"rsa_private_key": key.export_key().decode(), "rsa_public_key": key.publickey().export_key().decode()}
 
-def generate_full_entropy_qc(num_qubits:int)->QuantumCircuit:
+# Pares de claves precalculados por un hilo en segundo plano (se arranca en el lifespan de main.py)
+rsa_pool = RSAKeyPool(generate_rsa_keypair, {size: parse_depths(RSA_POOL_DEPTHS).get(size, 0) for size in RSA_KEY_SIZES})
+
+def build_full_entropy_template(num_qubits:int)->"QuantumCircuit":
     """
     Esta función crea un circuito de alta altropia. Usa superposición de qubits, entrelazamiento,
     variaciones de estados basicos, rotaciones aleatorias del eje Z, y aplicación de la trasformada
     cuántica de Fourier.
+    
+    Las fases aleatorias son Parameters (uno por qubit) que se asignan en cada petición:
+    S = RZ(pi/2) y T = RZ(pi/4) salvo una fase global, así que S, T y RZ(angle) juntas
+    son una única RZ(angle + s*pi/2 + t*pi/4).
     """
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+    from qiskit.circuit import ParameterVector
+    from qiskit.circuit.library import QFT
+    
     # Crear registros cuánticos y clásicos para evitar errores de indexación
     qreg = QuantumRegister(num_qubits, 'q')
     creg = ClassicalRegister(num_qubits, 'c')
     qc = QuantumCircuit(qreg, creg)
+    phases = ParameterVector("phase", num_qubits)
     
     # 1. Poner todos los qubits en superposición con Hadamard
     for i in range(num_qubits):
@@ -85,14 +113,9 @@ def generate_full_entropy_qc(num_qubits:int)->QuantumCircuit:
     for i in range(num_qubits - 1):
         qc.cx(qreg[i], qreg[i+1])
         
-    # 3. Agregar compuertas de fase aleatorias (S, T) y rotación Z para cada qubit
+    # 3. Compuertas de fase aleatorias (S, T) y rotación Z para cada qubit, como una RZ parametrizada
     for i in range(num_qubits):
-        if random.choice([True, False]):
-            qc.s(qreg[i])
-        if random.choice([True, False]):
-            qc.t(qreg[i])
-        angle = np.random.uniform(0, 2*np.pi)
-        qc.rz(angle, qreg[i])
+        qc.rz(phases[i], qreg[i])
     
     # 4. Aplicar QFT para mezclar aún más la entropía
     qft_circuit = QFT(num_qubits)
@@ -102,15 +125,48 @@ def generate_full_entropy_qc(num_qubits:int)->QuantumCircuit:
     qc.measure(qreg, creg)
     
     return qc
+
+@lru_cache(maxsize=SEED_TEMPLATE_CACHE_SIZE)
+def get_seed_template(num_qubits:int)->"QuantumCircuit":
+    """
+    Devuelve la plantilla ya transpilada para num_qubits qubits. Transpilar la QFT es lo
+    más caro, así que se hace una vez por num_qubits y se guardan las
+    SEED_TEMPLATE_CACHE_SIZE más recientes (LRU).
+    """
+    return quantum_engine.transpile(build_full_entropy_template(num_qubits), "seed")
+
+def random_phases(num_qubits:int)->np.ndarray:
+    """
+    Fases aleatorias de cada qubit: S y T con probabilidad 1/2 cada una más una RZ uniforme en [0, 2pi).
+    """
+    s = np.array([random.choice([True, False]) for _ in range(num_qubits)])
+    t = np.array([random.choice([True, False]) for _ in range(num_qubits)])
+    angles = np.random.uniform(0, 2*np.pi, num_qubits)
+    return np.mod(angles + s * np.pi/2 + t * np.pi/4, 2*np.pi)
+
+def generate_full_entropy_qc(num_qubits:int)->"QuantumCircuit":
+    """
+    Circuito de alta entropía (sin transpilar) con unas fases aleatorias ya asignadas.
+    """
+    return build_full_entropy_template(num_qubits).assign_parameters(random_phases(num_qubits))
     
     
 
 
+def _key_response(request: Request, key: bytes, format: Optional[str], field: str):
+    """
+    Serializa una clave: en json (por defecto) se mantiene el hexadecimal de siempre.
+    """
+    format = negotiate_format(request, format)
+    if format == "json":
+        format = "hex"
+    return encode_bytes(key, format, field)
+
 # =============================================================================================================================================================================
 
 
 @router.get("/aes",summary="Genera una clave AES con aleatoriedad cuántica.")
-def generate_aes_key(size: int = Query(32, description="Tamaño de la clave en bytes (16, 24 o 32)")):
+async def generate_aes_key(request: Request, size: int = Query(32, description="Tamaño de la clave en bytes (16, 24 o 32)"), format: Optional[ResponseFormat] = Query(None)):
     """
     
     Genera una clave AES aleatoria de 128, 192 o 256 bits con Qiskit.
@@ -120,58 +176,68 @@ def generate_aes_key(size: int = Query(32, description="Tamaño de la clave en b
     if size not in [16, 24, 32]:
         return {"error": "El tamaño debe ser 16, 24 o 32 bytes."}
     
-    key = generate_qiskit_bytes(size)
-    return {"aes_key": key.hex()}
+    key = await aget_bytes_from_buffer(size)
+    return _key_response(request, key, format, "aes_key")
 
-#@router.get("/rsa", summary="Genera un par de claves RSA con aleatoriedad cuántica.")
-#def generate_rsa_key():
+@router.get("/rsa", summary="Genera un par de claves RSA con aleatoriedad cuántica.")
+def generate_rsa_key(size: int = Query(2048, description="Tamaño de la clave en bits (2048, 3072 o 4096)")):
     """
-    Genera un par de claves RSA de 2048 bits usando bits del buffer global.
+    Devuelve un par de claves RSA generado con primos cuánticos. Sale del pool precalculado
+    (milisegundos) y, solo si el pool de ese tamaño está vacío, se genera en la petición.
+    Cada par se entrega una única vez.
     """
-    #p = generate_qiskit_prime(1024)
-    #q = generate_qiskit_prime(1024)
-    #key = RSA.construct((p * q, 65537))
-    #private_key = key.export_key().decode()
-    #public_key = key.publickey().export_key().decode()
-    #return {"rsa_private_key": private_key, "rsa_public_key": public_key}
+    if size not in rsa_pool:
+        raise HTTPException(status_code=400, detail="El tamaño debe ser 2048, 3072 o 4096 bits.")
+    
+    return rsa_pool.take(size) or generate_rsa_keypair(size)
+
+@router.get("/rsa/pool", summary="Estado del pool de claves RSA precalculadas y del motor de primos.")
+def get_rsa_pool_state():
+    
+    return {"pool": rsa_pool.snapshot(), "primes": prime_engine.stats()}
 
 @router.get("/uuid",summary="Genera un UUID aleatorio con aleatoriedad cuántica")
-def generate_uuid():
+async def generate_uuid(request: Request, format: Optional[ResponseFormat] = Query(None)):
     """
     Genera un UUID aleatorio con Qiskit.
     
     """
-    uuid_bytes = generate_qiskit_bytes(16)  
-    return {"uuid": uuid_bytes.hex()}
+    uuid_bytes = await aget_bytes_from_buffer(16)  
+    return _key_response(request, uuid_bytes, format, "uuid")
 
 @router.get("/otp",summary="Genera una clave secreta para OTP con aleatoriedad cuántica.")
-def generate_otp_secret():
+async def generate_otp_secret(request: Request, format: Optional[ResponseFormat] = Query(None)):
     """
     Genera una clave secreta para OTP con Qiskit.
     
     """
-    otp_bytes = generate_qiskit_bytes(10)  
+    otp_bytes = await aget_bytes_from_buffer(10)  
     
-    return {"otp_secret": otp_bytes.hex()}
+    return _key_response(request, otp_bytes, format, "otp_secret")
 
 @router.get("/seed",summary="Genera una semilla con máxima entropía, utilizando un circuito cuántico con fases de superposicíon, entrelazamiento, compuertas de fase aleatorias y una trasformada cuántica de Fourier")
-def generate_seed(num_qubits:int = 24)->dict:
+def generate_seed(request: Request, num_qubits:int = 24, format: Optional[ResponseFormat] = Query(None)):
     
     """
+    Devuelve la semilla como "qrs_<hex>" (json) o como sus bytes en el formato pedido.
     """
 
-    qc = generate_full_entropy_qc(num_qubits)
-    transpile_qc = transpile(qc,simulator)
-    result = simulator.run(transpile_qc,shots=1).result()
+    # La plantilla transpilada sale de la caché: solo se asignan las fases de esta petición
+    transpile_qc = get_seed_template(num_qubits).assign_parameters(random_phases(num_qubits))
+    result = quantum_engine.run(transpile_qc,shots=1)
     counts = result.get_counts()
     seed = list(counts.keys())[0]
     
-    seed_hex = "qrs_" + format(int(seed, 2), f'0{num_qubits//4}x')
+    seed_hex = "qrs_" + f"{int(seed, 2):0{num_qubits//4}x}"
 
     
     if not seed:
         return {"quantic_random_seed":"error"}
     
+    format = negotiate_format(request, format)
+    if format != "json":
+        return encode_bytes(int(seed, 2).to_bytes((num_qubits + 7) // 8, "big"), format, "quantic_random_seed")
+    
     return {"quantic_random_seed": seed_hex}
 
 # =============================================================================================================================================================================
@@ -0,0 +1,19 @@
+"""
+DocString:
+
+Endpoint /metrics con las métricas del servicio en el formato de texto de Prometheus
+(buffer, simulador, esperas de los consumidores, latencia por ruta y MongoDB).
+
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.core import metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics",summary="Devuelve las métricas del servicio en formato Prometheus")
+def get_metrics():
+    
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
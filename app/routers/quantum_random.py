@@ -5,18 +5,38 @@ Actualmente se usa la simulación con Qiskit Aer por alta latencia de los servid
 
 
 """
-from fastapi import APIRouter, HTTPException, status, Query
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import math
+import threading
+import numpy as np
+from app.core.formats import ResponseFormat, negotiate_format, encode_bytes, encode_array
+from app.core import bitconv
 from .g_buffer import *
+from . import g_buffer
 
 
 
 
 router = APIRouter()
-simulator = AerSimulator()      # Simulador Cuántico de Qiskit. Este microservicio podria interactuar con QPU's reales de IBM consumiendo su API. 
-                                # A efectos prácticos, con una API gratuita, se haria denso al tener las QPU's listas de espera de mas de 1 hora.
-                                # Por lo tanto, aqui se simula la computación cuámtica haciendo uso de Qiskit-Aer.
+
+# Simulador Cuántico de Qiskit: vive en app.core.quantum_engine y, a través del backend de entropía
+# (app.core.entropy_backends), alimenta el buffer global por lotes.
+# Este microservicio podria interactuar con QPU's reales de IBM consumiendo su API. 
+# A efectos prácticos, con una API gratuita, se haria denso al tener las QPU's listas de espera de mas de 1 hora.
+# Por lo tanto, aqui se simula la computación cuámtica haciendo uso de Qiskit-Aer.
+
+FLOAT_MAX_COUNT = 100000                # Máximo de floats por petición de /random/float
+RANGE_MAX_COUNT = 1000000               # Máximo de enteros por petición de /random/range/batch
+
+STREAM_CHUNK_BYTES = 64 * 1024          # Tamaño de cada trozo que se saca del buffer al hacer streaming
+STREAM_MAX_BYTES = 1024 * 1024 * 1024   # Máximo por petición de /random/stream (1 GiB)
+
+SAMPLER_REFILL_BYTES = 64               # Bytes que saca del buffer el muestreador cuando se queda sin bits
+SAMPLER_PRECISION_BITS = 32             # Margen del estado sobre el rango pedido: rechazo con prob. < 2**-32
+SAMPLER_MAX_STATE_BITS = 1024           # Tope del estado al reciclar los sobrantes de los lotes
+SAMPLER_MAX_COUNT = 64                  # Hasta este count, /random/range* usa el muestreador (si no, el lote vectorizado)
 
 
 def generate_qubit()->int:
@@ -28,41 +48,229 @@ def generate_qubit()->int:
     
     La aleatoriedad cuántica se consigue cuando, al medir un qubit en superoposición, lo hacemos colapsar a (0) ó (1) de forma aleatoria (50%)
     
+    El bit sale del buffer global (rellenado por lotes), no de un job del simulador por cada bit.
+    
+    """
+    
+    return get_bits_from_buffer(1)[0]
+    
+    
+class EntropySampler:
+    
     """
+    Muestreador uniforme que aprovecha casi toda la entropía de los bits cuánticos
+    (Fast Dice Roller con reciclado de la entropía sobrante, a lo Lumbroso).
     
-    qc = QuantumCircuit(1,1)
-    qc.h(0)
-    qc.measure(0,0)
+    El estado es un entero _value uniforme en [0, _range). Para sacar un valor en [0, n):
     
-    transpile_qc = transpile(qc,simulator)
-    result = simulator.run(transpile_qc,shots=1).result()
-    n = result.get_counts()
-   
-    try:
-        n = next(iter(n))
+        - se le meten bits frescos hasta que _range >= n * 2**SAMPLER_PRECISION_BITS
+        - si _value < q*n (q = _range // n), el resultado es _value % n y lo que queda,
+          _value // n, sigue siendo uniforme en [0, q): se guarda para la siguiente extracción
+        - si no (probabilidad < 2**-32), _value - q*n es uniforme en [0, _range % n) y se reintenta
+    
+    Así cada entero cuesta de media ~log2(n) bits en vez de bit_length(n), y la fracción de
+    bit que sobra de una petición no se tira: la aprovecha la siguiente.
+    """
+    
+    def __init__(self):
+        self._value = 0
+        self._range = 1
+        self._pool = 0       # --> bits frescos ya sacados del buffer y todavía sin usar
+        self._pool_bits = 0
+        self._lock = threading.Lock()
         
-    except:
+    def _feed(self, data: bytes) -> None:
+        with self._lock:
+            self._pool = (self._pool << (8 * len(data))) | int.from_bytes(data, "big")
+            self._pool_bits += 8 * len(data)
+            
+    def _try_randbelow(self, n: int, usage: dict):
+        """
+        Intenta sacar un valor en [0, n) con los bits que ya hay en el pool.
+        Devuelve None si hacen falta más bits del buffer.
+        """
+        target = n << SAMPLER_PRECISION_BITS
+        with self._lock:
+            while True:
+                if self._range < target:
+                    need = target.bit_length() - self._range.bit_length()
+                    if self._range << need < target:
+                        need += 1
+                    if need > self._pool_bits:
+                        return None
+                    
+                    self._pool_bits -= need
+                    fresh = self._pool >> self._pool_bits
+                    self._pool &= (1 << self._pool_bits) - 1
+                    self._value = (self._value << need) | fresh
+                    self._range <<= need
+                    usage["bits"] += need
+                    
+                q, r = divmod(self._range, n)
+                limit = self._range - r
+                if self._value < limit:
+                    result = self._value % n
+                    self._value //= n
+                    self._range = q
+                    return result
+                
+                self._value -= limit
+                self._range = r
+                
+    async def randbelow(self, n: int, usage: dict) -> int:
+        """
+        Devuelve un entero uniforme en [0, n). Los bits frescos usados se suman en usage["bits"].
+        """
+        while True:
+            result = self._try_randbelow(n, usage)
+            if result is not None:
+                return result
+            nbytes = max(SAMPLER_REFILL_BYTES, (n.bit_length() + SAMPLER_PRECISION_BITS) // 8 + 1)
+            self._feed(await aget_bytes_from_buffer(nbytes))
+            
+    def recycle(self, values, modulus: int) -> None:
+        """
+        Devuelve al estado valores uniformes en [0, modulus) que no se han llegado a usar
+        (los sobrantes de un lote), hasta llenar SAMPLER_MAX_STATE_BITS.
+        """
+        with self._lock:
+            for value in values:
+                if self._range.bit_length() >= SAMPLER_MAX_STATE_BITS:
+                    return
+                self._value = self._value * modulus + int(value)
+                self._range *= modulus
+                
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state_bits": round(math.log2(self._range), 3),
+                "pool_bits": self._pool_bits,
+            }
+
+
+entropy_sampler = EntropySampler()
+
+entropy_usage = {} # --> contabilidad por endpoint: bits consumidos frente a los teóricos
+entropy_usage_lock = threading.Lock()
+
+
+def account_entropy(endpoint: str, samples: int, consumed: int, theoretical: float) -> None:
+    
+    """
+    Suma a los contadores de un endpoint los bits que ha sacado del buffer y los que
+    necesitaba en teoría (log2 del número de resultados posibles).
+    """
+    
+    with entropy_usage_lock:
+        stats = entropy_usage.setdefault(endpoint, {"requests": 0, "samples": 0, "bits_consumed": 0, "bits_theoretical": 0.0})
+        stats["requests"] += 1
+        stats["samples"] += samples
+        stats["bits_consumed"] += consumed
+        stats["bits_theoretical"] += theoretical
+
+
+def group_layout(range_size: int) -> tuple:
+    
+    """
+    Para los lotes: cuántos valores j de [0, range_size) se empaquetan en cada candidato
+    de k bits (un valor uniforme en [0, range_size**j)) para gastar los mínimos bits por
+    valor. Con range_size = 3, por ejemplo, 1 por candidato cuesta 2.67 bits/valor de media
+    y 29 por candidato (3**29 < 2**46) 1.63, frente a los 1.585 teóricos.
+    
+    Returns:
+    
+        tuple: (j, k, range_size**j).
+    """
+    
+    best = (1, (range_size - 1).bit_length(), range_size)
+    best_cost = best[1] * 2**best[1] / range_size
+    
+    j = 2
+    while range_size**j <= 2**64:
+        modulus = range_size**j
+        k = (modulus - 1).bit_length()
+        cost = k * 2**k / (j * modulus) # --> bits esperados por valor contando los rechazos
+        if cost < best_cost - 1e-12:
+            best, best_cost = (j, k, modulus), cost
+        j += 1
         
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Qubit no encontrado")
+    return best
+
+
+async def sample_range(min: int, max: int, count: int, usage: Optional[dict] = None) -> np.ndarray:
     
-   
-    print(n)
+    """
+    Devuelve count enteros uniformes en [min, max) sin sesgo de módulo.
+    
+        - Pocos valores (count <= SAMPLER_MAX_COUNT): con el muestreador compartido, que
+          recicla la entropía sobrante entre peticiones.
+        - Lotes: muestreo con rechazo vectorizado, empaquetando j valores por candidato
+          de k bits (ver group_layout). Los valores que sobran del último lote vuelven al
+          muestreador en vez de tirarse.
     
-    return int(n)
+    Los bits sacados del buffer se suman en usage["bits"] si se pasa usage.
     
+    Returns:
+    
+        np.ndarray: int64 si el resultado cabe, si no array de objetos (ints de Python).
+    """
     
+    if usage is None:
+        usage = {"bits": 0}
+    range_size = max - min
+    fits_int64 = -2**63 <= min and max <= 2**63
+    dtype = np.int64 if fits_int64 else object
+    
+    if range_size == 1: # --> rango de un único valor: no hace falta entropía
+        return np.full(count, min, dtype=dtype)
+    
+    if count <= SAMPLER_MAX_COUNT:
+        values = [await entropy_sampler.randbelow(range_size, usage) + min for _ in range(count)]
+        return np.array(values, dtype=dtype)
+    
+    j, k, modulus = group_layout(range_size)
+    accept_rate = modulus / 2**k
+    accepted = []
+    missing = count
+    
+    while missing > 0:
+        candidates = math.ceil(math.ceil(missing / j) / accept_rate) # --> lo esperado, sin margen: si falta, otra vuelta
+        groups = bitconv.bits_to_uints(await aget_bit_array_from_buffer(candidates * k), k)
+        usage["bits"] += candidates * k
+        groups = groups[groups < modulus]
+        
+        if j > 1: # --> cada grupo son j dígitos en base range_size
+            digits = np.empty((len(groups), j), dtype=np.uint64)
+            base = np.uint64(range_size)
+            for i in range(j):
+                digits[:, i] = groups % base
+                groups = groups // base
+            groups = digits.ravel()
+            
+        accepted.append(groups[:missing])
+        entropy_sampler.recycle(groups[missing:], range_size)
+        missing -= len(accepted[-1])
+        
+    values = np.concatenate(accepted)
+    if fits_int64:
+        return values.astype(np.int64) + min
+    return values.astype(object) + min
+
+
 #Funciones Aleatoriedad:
 @router.get("/basic",summary="Devuelve un bit aleatorio de alta entropía en formato JSON")
-def get_random_bit()->dict:
+async def get_random_bit()->dict:
     
     """
     Devuelve un diciconario{} con un bit aleatorio (0 o 1), usando aleatoriedad cuántica desde un QPU de IBM.
     
     """
-    return {"random_bit":get_bits_from_buffer(1)}
+    bit = await aget_bits_from_buffer(1)
+    account_entropy("basic", 1, 1, 1)
+    return {"random_bit":bit}
 
 @router.get("/range",summary="Devuelve un bit aleatorio dentro de un rango, especificando un máximo y un mínimo en formato JSON")
-def get_random_number(min: int = Query(0), max: int = Query(100)):
+async def get_random_number(min: int = Query(0), max: int = Query(100)):
     
     """
     Devuelve un número aleatorio cuántico dentro de un rango dado en la query.
@@ -72,57 +280,138 @@ def get_random_number(min: int = Query(0), max: int = Query(100)):
     if min >= max:
         raise HTTPException(status_code=400, detail="El valor mínimo debe ser menor que el máximo.")
     
-    range_size = max - min
-    num_bits = range_size.bit_length()
+    # Sin sesgo de módulo y reciclando la entropía sobrante de peticiones anteriores
+    usage = {"bits": 0}
+    random_number = int((await sample_range(min, max, 1, usage))[0])
+    account_entropy("range", 1, usage["bits"], math.log2(max - min))
+    return {"random_number": random_number}
+
+@router.get("/range/batch",summary="Devuelve muchos enteros aleatorios sin sesgo dentro de un rango [min, max) en una sola petición")
+async def get_random_numbers(request: Request, min: int = Query(0), max: int = Query(100), count: int = Query(1000, gt=0, le=RANGE_MAX_COUNT), format: Optional[ResponseFormat] = Query(None)):
     
-    # Extraemos los bits necesarios del buffer, en lugar de generarlos individualmente
-    bits = get_bits_from_buffer(num_bits)
+    """
+    Devuelve count enteros uniformes en [min, max) (max excluido), con muestreo con
+    rechazo vectorizado sobre una única extracción grande del buffer (empaquetando
+    varios valores por candidato para gastar cerca de log2(max-min) bits por entero).
+    Con format=raw|hex|base64 los enteros van en binario (int64 little-endian).
     
-    random_number = min + int("".join(map(str, bits)), 2) % range_size
-    return {"random_number": random_number}
+    Ejemplo --> /random/range/batch?min=1&max=7&count=100000&format=raw
+    """
+    if min >= max:
+        raise HTTPException(status_code=400, detail="El valor mínimo debe ser menor que el máximo.")
+    
+    usage = {"bits": 0}
+    values = await sample_range(min, max, count, usage)
+    account_entropy("range/batch", count, usage["bits"], count * math.log2(max - min))
+    
+    format = negotiate_format(request, format)
+    if values.dtype == object and format not in ("json", "array"):
+        raise HTTPException(status_code=400, detail="Los enteros de más de 64 bits solo pueden devolverse en formato json o array.")
+    
+    return encode_array(values, format, "random_numbers")
     
 @router.get("/bits",summary="Devuelve una cadena de bits de una longitud detarminada en la consulta en formato JSON.")
-def get_random_bits(size: int = Query(8)):
+async def get_random_bits(request: Request, size: int = Query(8), format: Optional[ResponseFormat] = Query(None)):
     
     """
     Devuelve una cadena de bits cuánticos aleatorios de una dimensión dada.
+    Con format=raw|hex|base64 los bits van empaquetados (8 por byte, el último byte
+    relleno con ceros) y con format=array como lista de 0/1.
     
     Ejmplo --> */random/bits?size=16
     
     """
-    bits_list = get_bits_from_buffer(size)
-    bits = "".join(str(b) for b in bits_list)
-    return {"random_bits": bits}
+    format = negotiate_format(request, format)
+    if format in ("raw", "hex", "base64"):
+        packed = await aget_packed_bits_from_buffer(size) # --> del buffer empaquetado directamente a la respuesta
+        account_entropy("bits", size, size, size)
+        return encode_bytes(packed, format, "random_bits", headers={"X-Bit-Length": str(size)})
+    
+    bits = await aget_bit_array_from_buffer(size)
+    account_entropy("bits", size, size, size)
+    if format == "array":
+        return {"random_bits": bits.tolist()}
+    return {"random_bits": bitconv.bits_to_bitstring(bits)}
 
 @router.get("/bytes",summary="Devuelve una cadena de Bytes de una longitud determinada en la consulta en formato JSON")
-def get_random_bytes(size: int = Query(8)):
+async def get_random_bytes(request: Request, size: int = Query(8), format: Optional[ResponseFormat] = Query(None)):
+    
+    """
+    Devuelve una secuencia de bytes aleatorios en formato hexadecimal
+    (o raw/base64/array con el parámetro format).
+    
+    """
+    
+    data = await aget_bytes_from_buffer(size)
+    account_entropy("bytes", size, 8 * size, 8 * size)
+    
+    format = negotiate_format(request, format)
+    if format == "json":
+        format = "hex"
+    return encode_bytes(data, format, "random_bytes")
+
+@router.get("/stream",summary="Devuelve un flujo binario (application/octet-stream) de bytes aleatorios, para descargas grandes")
+async def stream_random_bytes(size: int = Query(1024 * 1024, gt=0, le=STREAM_MAX_BYTES, description="Número de bytes a devolver")):
     
     """
-    Devuelve una secuencia de bytes aleatorios en formato hexadecimal.
+    Devuelve size bytes aleatorios como un StreamingResponse por trozos.
+    Cada trozo se saca del buffer justo antes de enviarlo, así que la memoria usada
+    es constante (un trozo) y el ritmo lo marca el cliente: si lee despacio, no se
+    consume entropía de más.
+    
+    Con el buffer detenido y sin bits suficientes responde 503 (antes de empezar el flujo:
+    una vez mandadas las cabeceras ya no se puede cambiar el código de estado).
     
+    Ejemplo --> /random/stream?size=104857600
     """
     
-    bits = [generate_qubit() for _ in range(size * 8)]
-    byte_array = [int("".join(map(str, bits[i:i+8])), 2) for i in range(0, len(bits), 8)]
+    g_buffer.check_can_serve(8 * size)
+    first = await aget_bytes_from_buffer(min(size, STREAM_CHUNK_BYTES)) # --> si falla, aún es un error HTTP normal
     
-    return {"random_bytes": bytes(byte_array).hex()}
+    async def chunks():
+        chunk = first
+        drawn = len(chunk) # --> bytes sacados del buffer, aunque el cliente corte a medias
+        try:
+            while True:
+                yield chunk
+                if drawn >= size:
+                    break
+                chunk = await aget_bytes_from_buffer(min(size - drawn, STREAM_CHUNK_BYTES))
+                drawn += len(chunk)
+        finally:
+            account_entropy("stream", drawn, 8 * drawn, 8 * drawn) # --> una sola petición por flujo
+            
+    return StreamingResponse(
+        chunks(),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size)},
+    )
 
 @router.get("/float",summary="Devuelve un numero decimal aleatorio de alta entropía en formato JSON")
-def get_random_float()->dict:
+async def get_random_float(request: Request, count: int = Query(1, gt=0, le=FLOAT_MAX_COUNT), format: Optional[ResponseFormat] = Query(None)):
     """
-    Devuelve un número flotante aleatorio entre 0 y 1 basado en qubits.
+    Devuelve un número flotante aleatorio entre 0 y 1 basado en qubits, con los 53 bits
+    de precisión de un double. Con count > 1 devuelve un lote (random_floats).
+    Cada float gasta exactamente 53 bits, que es el mínimo teórico para 2**53 valores posibles.
     
+    Ejemplo --> /random/float?count=1000&format=base64
     """
     
-    bits = [generate_qubit() for _ in range(10)]
-    fraction = sum(bit * (2 ** -i) for i, bit in enumerate(bits, 1))
+    bits = await aget_bit_array_from_buffer(bitconv.FLOAT_BITS * count)
+    floats = bitconv.bits_to_floats(bits)
+    account_entropy("float", count, len(bits), bitconv.FLOAT_BITS * count)
+    
+    format = negotiate_format(request, format)
+    if count == 1 and format == "json":
+        return {"random_float": float(floats[0])}
     
-    return {"random_float": fraction}
+    return encode_array(floats, format, "random_floats")
 
 @router.get("/bool",summary="Devuelve un booleano condicional aleatorio en formato JSON")
-def get_bool()->dict:
+async def get_bool()->dict:
     
-    bit = get_bits_from_buffer(1)
+    bit = await aget_bits_from_buffer(1)
+    account_entropy("bool", 1, 1, 1)
     response = False
     print(bit)
     if bit == [1]:
@@ -130,6 +419,28 @@ def get_bool()->dict:
     
     return {"random_boolean":response}
 
+@router.get("/entropy",summary="Devuelve, por endpoint, los bits cuánticos consumidos frente a los necesarios en teoría")
+async def get_entropy_usage()->dict:
+    
+    """
+    Contabilidad de entropía de los endpoints de /random: bits sacados del buffer,
+    bits teóricos (log2 de los resultados posibles) y eficiencia (teóricos / consumidos).
+    Incluye el estado del muestreador compartido (entropía guardada para la siguiente petición).
+    """
+    
+    with entropy_usage_lock:
+        endpoints = {
+            endpoint: {
+                **stats,
+                "bits_theoretical": round(stats["bits_theoretical"], 3),
+                "efficiency": round(stats["bits_theoretical"] / stats["bits_consumed"], 4) if stats["bits_consumed"] else None,
+            }
+            for endpoint, stats in entropy_usage.items()
+        }
+    
+    return {"endpoints": endpoints, "sampler": entropy_sampler.snapshot()}
+
 if __name__ == "__main__":
     
-    generate_qubit()
\ No newline at end of file
+    start_buffer_thread()
+    print(generate_qubit())
\ No newline at end of file
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import base64
+import binascii
+import json
 from app.core.security import get_current_user
 from app.models.user import User
-from app.core.db import create_user, get_user, update_user, delete_user, list_users
+from app.core.db import create_user, get_user, update_user, delete_user, list_users, iter_users, create_users_bulk
+from app.config import BULK_USERS_MAX
 
 
 router = APIRouter()
 
+NDJSON = "application/x-ndjson"
+USERS_PAGE_MAX = 1000 # --> máximo de usuarios por página en GET /users/
+
+
+def encode_cursor(username: str) -> str:
+    """Cursor opaco de GET /users/: el username en base64 URL-safe (las cabeceras HTTP solo admiten Latin-1)."""
+    return base64.urlsafe_b64encode(username.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+
 
 @router.get("/me",summary="Devuelve los datos del Usuario autenticado.")
 async def read_users_me(current_user: User = Depends(get_current_user)):
@@ -21,11 +42,67 @@ async def create_new_user(user: dict, current_user: User = Depends(get_current_u
     return {"message": "Usuario creado", "user_id": user_id}
 
 
-@router.get("/",summary="Devuelve un JSON con todos los Usuarios registrados en la base de datos.")
-async def get_all_users(current_user: User = Depends(get_current_user)):
+@router.post("/bulk",summary="Crea muchos Usuarios de una vez (array JSON o NDJSON)")
+async def create_users_in_bulk(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Alta masiva: el cuerpo es un array JSON de usuarios o NDJSON (un usuario por línea,
+    Content-Type: application/x-ndjson). Cada usuario necesita username y password.
+    Las contraseñas se hashean en paralelo en un pool de procesos y se inserta por lotes.
+    
+    Devuelve un resultado por usuario (created, duplicate, invalid o error) en el mismo
+    orden que la entrada, y los totales por estado. Hasta BULK_USERS_MAX usuarios por petición.
+    """
+    if current_user.username != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos para crear usuarios")
+    
+    body = await request.body()
+    try:
+        if NDJSON in request.headers.get("content-type", ""):
+            users = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            users = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El cuerpo debe ser un array JSON o NDJSON válido")
+    if not isinstance(users, list):
+        raise HTTPException(status_code=400, detail="El cuerpo debe ser un array JSON o NDJSON válido")
+    if len(users) > BULK_USERS_MAX:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_USERS_MAX} usuarios por petición")
+    
+    results = await create_users_bulk(users)
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"summary": summary, "results": results}
+
+
+@router.get("/",summary="Devuelve los Usuarios registrados en la base de datos, paginados por cursor o en streaming NDJSON.")
+async def get_all_users(request: Request, response: Response, cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+                        limit: int = Query(100, gt=0, le=USERS_PAGE_MAX), stream: bool = Query(False, description="Devuelve todos los usuarios como NDJSON"),
+                        current_user: User = Depends(get_current_user)):
+    """
+    Devuelve una página de usuarios (sin hashes de contraseñas) ordenada por username.
+    Si hay más, la cabecera X-Next-Cursor trae el cursor de la página siguiente.
+    
+    Con stream=true (o Accept: application/x-ndjson) devuelve TODOS los usuarios desde el
+    cursor, uno por línea, según los va leyendo de Mongo (memoria constante).
+    
+    El cursor es opaco (el username del último usuario en base64 URL-safe, ver encode_cursor).
+    
+    Ejemplo --> /users/?limit=500&cursor=bWFyaWE
+    """
     if current_user.username != "admin":
         raise HTTPException(status_code=403, detail="No tienes permisos para ver la lista de usuarios")
-    users = await list_users()
+    after = decode_cursor(cursor) if cursor else None
+    
+    if stream or NDJSON in request.headers.get("accept", ""):
+        async def lines():
+            async for user in iter_users(after):
+                yield json.dumps(user, default=str) + "\n"
+        return StreamingResponse(lines(), media_type=NDJSON)
+    
+    users = await list_users(after, limit)
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(users[-1]["username"])
     return users
 
 
@@ -0,0 +1,85 @@
+"""
+
+Microbenchmarks de la capa de conversión de bits (app.core.bitconv) frente a las
+conversiones con cadenas que se usaban en los routers:
+
+                - bits -> bytes    : int("".join(map(str, bits[i:i+8])), 2) por byte
+                - bits -> uint64   : int("".join(map(str, bits[i:i+64])), 2) por valor
+                - bits -> cadena   : "".join(str(b) for b in bits)
+
+Uso --> python benchmarks/bench_bitconv.py [--max-legacy-bytes N]
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import numpy as np
+from app.core import bitconv
+
+
+SIZES = [1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024] # --> de 1 KB a 10 MB
+
+
+def legacy_bytes(bits):
+    return bytes(int("".join(map(str, bits[i:i+8])), 2) for i in range(0, len(bits), 8))
+
+
+def legacy_uint64(bits):
+    return [int("".join(map(str, bits[i:i+64])), 2) for i in range(0, len(bits), 64)]
+
+
+def legacy_bitstring(bits):
+    return "".join(str(b) for b in bits)
+
+
+CASES = [
+    ("bits->bytes", legacy_bytes, bitconv.bits_to_bytes),
+    ("bits->uint64", legacy_uint64, lambda bits: bitconv.bits_to_uints(bits, 64)),
+    ("bits->str", legacy_bitstring, bitconv.bits_to_bitstring),
+]
+
+
+def timed(function, argument) -> float:
+    start = time.perf_counter()
+    function(argument)
+    return time.perf_counter() - start
+
+
+def run(max_legacy_bytes: int) -> list:
+    results = []
+    rng = np.random.default_rng(0)
+    for size in SIZES:
+        bits = rng.integers(0, 2, size * 8, dtype=np.uint8)
+        bits_list = bits.tolist() # --> los routers antiguos trabajaban con listas de ints
+        for name, legacy, vectorized in CASES:
+            new_seconds = timed(vectorized, bits)
+            legacy_seconds = timed(legacy, bits_list) if size <= max_legacy_bytes else None
+            results.append({
+                "case": name,
+                "bytes": size,
+                "legacy_seconds": legacy_seconds,
+                "bitconv_seconds": new_seconds,
+                "speedup": legacy_seconds / new_seconds if legacy_seconds else None,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-legacy-bytes", type=int, default=SIZES[-1],
+                        help="Tamaño máximo al que se mide también la versión antigua (es muy lenta)")
+    args = parser.parse_args()
+
+    print(f"{'caso':<14}{'tamaño':>12}{'antes (s)':>14}{'bitconv (s)':>14}{'speed-up':>12}")
+    for row in run(args.max_legacy_bytes):
+        legacy = f"{row['legacy_seconds']:.4f}" if row["legacy_seconds"] is not None else "-"
+        speedup = f"x{row['speedup']:.0f}" if row["speedup"] else "-"
+        print(f"{row['case']:<14}{row['bytes']:>12}{legacy:>14}{row['bitconv_seconds']:>14.5f}{speedup:>12}")
+
+
+if __name__ == "__main__":
+    main()
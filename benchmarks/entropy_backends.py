@@ -0,0 +1,105 @@
+"""
+
+Benchmark de los backends de entropía (app.core.entropy_backends): bits/s de cada uno.
+
+Para cada backend se mide el warm-up y, después, lotes del tamaño que pediría el buffer
+(target bits, acotado al máximo de shots del backend). Además se pasa un test de
+frecuencia (monobit) sobre todos los bits generados, para descartar backends rotos.
+
+Al final recomienda el backend de producción más rápido que cumpla --min-bits-per-second
+y el monobit; se activa con ENTROPY_BACKEND=<nombre>, sin tocar código.
+
+Uso --> python benchmarks/entropy_backends.py [--backends aer,clifford] [--bits 1000000]
+                                               [--repeat 5] [--output entropy_backends.json]
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import math
+import time
+import numpy as np
+from app.core.entropy_backends import BACKENDS, get_backend
+
+
+MONOBIT_MAX_Z = 4.0 # --> |z| del test de frecuencia por encima del cual el backend se descarta
+
+
+def monobit_z(ones: int, total: int) -> float:
+    """Desviación (en desviaciones típicas) del número de unos respecto a total/2."""
+    return (2 * ones - total) / math.sqrt(total)
+
+
+def bench_backend(name: str, target_bits: int, repeat: int) -> dict:
+    backend = get_backend(name, allow_insecure=True) # --> el stub se mide, pero nunca se recomienda
+
+    start = time.perf_counter()
+    backend.warm_up()
+    warm_up = time.perf_counter() - start
+
+    shots = backend.shots_for_deficit(target_bits)
+    backend.sample_bits(min(shots, 100)) # --> primer lote fuera de la medida
+    seconds = []
+    ones = 0
+    total = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bits = backend.sample_bits(shots)
+        seconds.append(time.perf_counter() - start)
+        ones += int(np.count_nonzero(bits))
+        total += len(bits)
+
+    best = min(seconds)
+    z = monobit_z(ones, total)
+    return {
+        "backend": name,
+        "production": backend.production,
+        "warm_up_seconds": round(warm_up, 4),
+        "shots_per_batch": shots,
+        "bits_per_batch": shots * backend.bits_per_shot,
+        "batch_seconds_best": round(best, 6),
+        "batch_seconds_mean": round(sum(seconds) / len(seconds), 6),
+        "bits_per_second": round(shots * backend.bits_per_shot / best, 1),
+        "monobit_z": round(z, 3),
+        "monobit_ok": abs(z) < MONOBIT_MAX_Z,
+    }
+
+
+def recommend(results: list, min_bits_per_second: float):
+    candidates = [result for result in results
+                  if result["production"] and result["monobit_ok"] and result["bits_per_second"] >= min_bits_per_second]
+    return max(candidates, key=lambda result: result["bits_per_second"])["backend"] if candidates else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Backends a medir, separados por comas")
+    parser.add_argument("--bits", type=int, default=1_000_000, help="Bits por lote (lo que pediría el buffer)")
+    parser.add_argument("--repeat", type=int, default=5, help="Lotes por backend")
+    parser.add_argument("--min-bits-per-second", type=float, default=0, help="Mínimo exigido para recomendar un backend")
+    parser.add_argument("--output", default=None, help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.backends.split(","):
+        result = bench_backend(name, args.bits, args.repeat)
+        results.append(result)
+        print(f"  {name:<16}{result['bits_per_second'] / 1e6:>12.2f} Mbit/s   lote {result['bits_per_batch']:>9} bits "
+              f"en {result['batch_seconds_best'] * 1000:>9.2f} ms   warm-up {result['warm_up_seconds']:.2f} s   "
+              f"monobit z={result['monobit_z']:+.2f}")
+
+    choice = recommend(results, args.min_bits_per_second)
+    print(f"[+] Recomendado: ENTROPY_BACKEND={choice}" if choice else "[!] Ningún backend cumple los requisitos")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "recommended": choice}, f, indent=2)
+        print(f"[+] Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+
+Sustituto en memoria de la colección de motor (users_collection) para medir sin MongoDB Atlas.
+
+Implementa el subconjunto de la API asíncrona de motor que usa app.core.db:
+
+                - find_one / find (con sort, limit, skip, batch_size, to_list e iteración), con proyección
+                - insert_one / insert_many (con BulkWriteError como pymongo), update_one ($set), delete_one
+                - create_index (solo se respeta unique=True sobre un campo)
+                - FakeClient: admin.command("ping") y close(), para el lifespan de app.main
+
+Los filtros admiten igualdad y los operadores $gt, $gte, $lt, $lte e $in.
+Uso --> fake_mongo.install() cambia app.core.db.users_collection por una FakeCollection
+        (y app.core.db.client por un FakeClient).
+
+"""
+import asyncio
+import copy
+import itertools
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+LATENCY_SECONDS = 0.0 # --> latencia simulada por operación (0 = solo coste de CPU)
+
+_OPERATORS = {
+    "$gt": lambda value, ref: value is not None and value > ref,
+    "$gte": lambda value, ref: value is not None and value >= ref,
+    "$lt": lambda value, ref: value is not None and value < ref,
+    "$lte": lambda value, ref: value is not None and value <= ref,
+    "$in": lambda value, ref: value in ref,
+}
+
+
+def _matches(document: dict, filter: dict) -> bool:
+    for field, condition in (filter or {}).items():
+        value = document.get(field)
+        if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            if not all(_OPERATORS[op](value, ref) for op, ref in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    included = [field for field, flag in projection.items() if flag and field != "_id"]
+    if included:
+        result = {field: copy.deepcopy(document[field]) for field in included if field in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    return {field: copy.deepcopy(value) for field, value in document.items() if projection.get(field, 1)}
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCursor:
+
+    def __init__(self, collection, filter, projection):
+        self._collection = collection
+        self._filter = filter
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    def _documents(self) -> list:
+        documents = [document for document in self._collection._documents.values() if _matches(document, self._filter)]
+        for field, direction in reversed(self._sort):
+            documents.sort(key=lambda document: document.get(field), reverse=direction < 0)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return [_project(document, self._projection) for document in documents]
+
+    async def to_list(self, length=None):
+        await self._collection._latency()
+        documents = self._documents()
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._collection._latency()
+        for document in self._documents():
+            yield document
+
+
+class FakeCollection:
+
+    def __init__(self, latency: float = LATENCY_SECONDS):
+        self.latency = latency
+        self._documents = {}
+        self._unique = set()
+        self.calls = itertools.count()
+
+    async def _latency(self) -> None:
+        next(self.calls)
+        await asyncio.sleep(self.latency) # --> con 0 cede el bucle igual que una llamada de red
+
+    def _check_unique(self, document: dict) -> None:
+        for field in self._unique:
+            if any(other.get(field) == document.get(field) for other in self._documents.values()):
+                raise DuplicateKeyError(f"E11000 duplicate key error: {field}", code=11000)
+
+    async def create_index(self, keys, unique: bool = False, **kwargs):
+        field = keys if isinstance(keys, str) else keys[0][0]
+        if unique:
+            self._unique.add(field)
+        return f"{field}_1"
+
+    async def find_one(self, filter=None, projection=None, **kwargs):
+        await self._latency()
+        for document in self._documents.values():
+            if _matches(document, filter):
+                return _project(document, projection)
+        return None
+
+    def find(self, filter=None, projection=None, **kwargs):
+        return FakeCursor(self, filter, projection)
+
+    async def insert_one(self, document: dict):
+        await self._latency()
+        self._check_unique(document)
+        document.setdefault("_id", ObjectId())
+        self._documents[document["_id"]] = copy.deepcopy(document)
+        return _Result(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: list, ordered: bool = True):
+        """Como pymongo: los fallos se acumulan en un BulkWriteError con su posición (index)."""
+        await self._latency()
+        inserted = []
+        errors = []
+        for index, document in enumerate(documents):
+            try:
+                self._check_unique(document)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e), "op": document})
+                if ordered:
+                    break
+                continue
+            document.setdefault("_id", ObjectId())
+            self._documents[document["_id"]] = copy.deepcopy(document)
+            inserted.append(document["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted), "writeConcernErrors": []})
+        return _Result(inserted_ids=inserted)
+
+    async def update_one(self, filter: dict, update: dict):
+        await self._latency()
+        for document in self._documents.values():
+            if _matches(document, filter):
+                document.update(copy.deepcopy(update.get("$set", {})))
+                return _Result(matched_count=1, modified_count=1)
+        return _Result(matched_count=0, modified_count=0)
+
+    async def delete_one(self, filter: dict):
+        await self._latency()
+        for key, document in list(self._documents.items()):
+            if _matches(document, filter):
+                del self._documents[key]
+                return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    async def count_documents(self, filter: dict):
+        await self._latency()
+        return sum(1 for document in self._documents.values() if _matches(document, filter))
+
+
+class _FakeAdmin:
+
+    def __init__(self, client):
+        self._client = client
+
+    async def command(self, name: str, *args, **kwargs):
+        await asyncio.sleep(0)
+        self._client.commands.append(name)
+        return {"ok": 1.0}
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.commands = []
+        self.closed = False
+        self.admin = _FakeAdmin(self)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def install(latency: float = LATENCY_SECONDS) -> FakeCollection:
+    """
+    Sustituye la colección de usuarios de app.core.db por una FakeCollection vacía
+    y el cliente por un FakeClient.
+    """
+    from app.core import db
+
+    collection = FakeCollection(latency)
+    db.users_collection = collection
+    db.client = FakeClient()
+    return collection
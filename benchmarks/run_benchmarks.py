@@ -0,0 +1,243 @@
+"""
+
+Suite de benchmarks y carga, sin red ni MongoDB Atlas (la colección de usuarios es
+la FakeCollection en memoria de benchmarks/fake_mongo.py):
+
+                - micro     : generate_random_bits, get_bits_from_buffer y las conversiones de bitconv
+                - endpoints : peticiones en serie a /random/*, /keys/* y /auth/login (latencia y req/s)
+                - load      : N clientes concurrentes contra una mezcla de endpoints (p50, p99,
+                              req/s y bits/s servidos por el buffer)
+
+Los resultados se escriben en JSON (--output) para poder comparar ejecuciones.
+
+Uso --> python benchmarks/run_benchmarks.py [--quick] [--output results.json] [--only micro,endpoints,load]
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+import httpx
+import numpy as np
+import fake_mongo
+
+
+ADMIN = {"username": "admin", "password": "1234"}
+
+ENDPOINTS = [
+    ("GET", "/random/basic"),
+    ("GET", "/random/range?min=1&max=7"),
+    ("GET", "/random/range/batch?min=1&max=7&count=10000&format=raw"),
+    ("GET", "/random/bits?size=1024"),
+    ("GET", "/random/bytes?size=1024"),
+    ("GET", "/random/float?count=1000&format=raw"),
+    ("GET", "/random/bool"),
+    ("GET", "/keys/aes"),
+    ("GET", "/keys/uuid"),
+    ("GET", "/keys/otp"),
+    ("GET", "/keys/seed?num_qubits=8"),
+    ("GET", "/keys/rsa?size=2048"),
+    ("POST", "/auth/login"),
+]
+
+LOAD_MIX = [
+    ("GET", "/random/range?min=1&max=7"),
+    ("GET", "/random/bytes?size=256"),
+    ("GET", "/random/float?count=100"),
+    ("GET", "/keys/aes"),
+    ("GET", "/keys/uuid"),
+]
+
+SLOW_ENDPOINTS = {"/keys/rsa?size=2048": 3, "/keys/seed?num_qubits=8": 10, "/auth/login": 10} # --> iteraciones máximas
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    """Percentiles de latencia (ms) y throughput de una serie de peticiones."""
+    values = np.asarray(latencies) * 1000
+    return {
+        "requests": len(values),
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(len(values) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def bench(function, repeat: int) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_micro(quick: bool) -> list:
+    from app.routers import g_buffer
+    from app.core import bitconv
+
+    repeat = 5 if quick else 20
+    bits = np.random.default_rng(0).integers(0, 2, 8 * 1024 * 1024, dtype=np.uint8)
+    cases = [
+        ("generate_random_bits(1)", lambda: g_buffer.generate_random_bits(1)),
+        ("generate_random_bits(10000)", lambda: g_buffer.generate_random_bits(10000)),
+        ("get_bits_from_buffer(1024)", lambda: g_buffer.get_bits_from_buffer(1024)),
+        ("get_bytes_from_buffer(4096)", lambda: g_buffer.get_bytes_from_buffer(4096)),
+        ("bitconv.bits_to_bytes(1 MB)", lambda: bitconv.bits_to_bytes(bits)),
+        ("bitconv.bits_to_uints(1 MB, 64)", lambda: bitconv.bits_to_uints(bits, 64)),
+        ("bitconv.bits_to_floats(1 MB)", lambda: bitconv.bits_to_floats(bits)),
+    ]
+
+    results = []
+    for name, function in cases:
+        results.append({"case": name, **bench(function, repeat)})
+        print(f"  micro  {name:<34}p50 {results[-1]['p50_ms']:>10.3f} ms")
+    return results
+
+
+async def request(client: httpx.AsyncClient, method: str, path: str, token: str) -> httpx.Response:
+    if path == "/auth/login":
+        return await client.post(path, data=ADMIN)
+    return await client.request(method, path, headers={"Authorization": f"Bearer {token}"})
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/auth/login", data=ADMIN)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_endpoints(client: httpx.AsyncClient, quick: bool) -> list:
+    token = await login(client)
+    iterations = 20 if quick else 200
+    results = []
+
+    for method, path in ENDPOINTS:
+        repeat = min(iterations, SLOW_ENDPOINTS.get(path, iterations))
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            response = await request(client, method, path, token)
+            latencies.append(time.perf_counter() - begin)
+            errors += response.status_code >= 400
+        results.append({"endpoint": f"{method} {path}", "errors": errors, **summarize(latencies, time.perf_counter() - start)})
+        print(f"  endpoint {method} {path:<56}p50 {results[-1]['p50_ms']:>10.3f} ms")
+    return results
+
+
+async def run_load(client: httpx.AsyncClient, concurrency: int, duration: float) -> dict:
+    from app.routers import g_buffer
+
+    token = await login(client)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        nonlocal errors
+        i = index
+        while time.perf_counter() < deadline:
+            method, path = LOAD_MIX[i % len(LOAD_MIX)]
+            begin = time.perf_counter()
+            response = await request(client, method, path, token)
+            latencies.append(time.perf_counter() - begin)
+            errors += response.status_code >= 400
+            i += 1
+
+    consumed_before = g_buffer.refill_controller.drain.total
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    consumed = g_buffer.refill_controller.drain.total - consumed_before
+
+    result = {
+        "concurrency": concurrency,
+        "mix": [f"{method} {path}" for method, path in LOAD_MIX],
+        "errors": errors,
+        "bits_consumed": consumed,
+        "bits_per_second": round(consumed / elapsed, 2),
+        **summarize(latencies, elapsed),
+    }
+    print(f"  load   {concurrency} clientes: {result['requests_per_second']} req/s, "
+          f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, {result['bits_per_second']} bits/s")
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    collection = fake_mongo.install()
+    from app.core.security import get_password_hash
+    await collection.insert_one({"username": ADMIN["username"], "hashed_password": get_password_hash(ADMIN["password"])})
+
+    start = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - start
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+            "import_app_seconds": round(import_seconds, 4),
+        }
+    }
+
+    async with app.router.lifespan_context(app):
+        from app.core import startup
+        results["startup"] = {name: round(seconds, 4) for name, seconds in startup.report.items()}
+
+        if "micro" in args.only:
+            results["micro"] = run_micro(args.quick)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if "endpoints" in args.only:
+                results["endpoints"] = await run_endpoints(client, args.quick)
+            if "load" in args.only:
+                duration = min(args.duration, 3.0) if args.quick else args.duration
+                results["load"] = await run_load(client, args.concurrency, duration)
+
+    results["mongo_calls"] = next(collection.calls)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json", help="Fichero JSON de resultados")
+    parser.add_argument("--quick", action="store_true", help="Menos iteraciones (para comprobar que todo funciona)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes concurrentes del escenario de carga")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos del escenario de carga")
+    parser.add_argument("--only", default="micro,endpoints,load", help="Bloques a ejecutar, separados por comas")
+    args = parser.parse_args()
+    args.only = set(args.only.split(","))
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+
+Pruebas del buffer circular de bits empaquetados (app.core.bit_buffer):
+
+                - Lecturas y escrituras con vuelta al principio del array
+                - Lecturas y escrituras no alineadas a byte
+                - Coherencia entre la lectura por bits y la lectura por bytes
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import pytest
+from app.core.bit_buffer import BitRingBuffer
+
+
+def bits_to_bytes(bits):
+    return bytes(int("".join(map(str, bits[i:i+8])), 2) for i in range(0, len(bits), 8))
+
+
+def test_capacity_rounded_to_bytes():
+    buffer = BitRingBuffer(6500)
+    assert buffer.capacity == 6504
+    assert len(buffer) == 0
+    assert buffer.free == 6504
+
+
+def test_fifo_order_with_wraparound():
+    rng = random.Random(1234)
+    buffer = BitRingBuffer(64)
+    expected = []
+
+    # Escrituras y lecturas de tamaños arbitrarios para forzar vueltas no alineadas
+    for _ in range(500):
+        bits = [rng.randint(0, 1) for _ in range(rng.randint(1, 40))]
+        written = buffer.write_bits(bits)
+        expected.extend(bits[:written])
+
+        n = rng.randint(0, len(buffer))
+        assert buffer.read_bits(n).tolist() == expected[:n]
+        del expected[:n]
+        assert len(buffer) == len(expected)
+
+
+def test_write_truncates_when_full():
+    buffer = BitRingBuffer(16)
+    assert buffer.write_bits([1] * 20) == 16
+    assert buffer.write_bits([0]) == 0
+    assert buffer.free == 0
+
+
+def test_read_bytes_matches_bits():
+    rng = random.Random(42)
+    buffer = BitRingBuffer(128)
+    expected = []
+
+    for _ in range(200):
+        bits = [rng.randint(0, 1) for _ in range(rng.randint(1, 50))]
+        expected.extend(bits[:buffer.write_bits(bits)])
+
+        if len(buffer) >= 16:
+            assert buffer.read_bytes(2) == bits_to_bytes(expected[:16])
+            del expected[:16]
+
+        if len(buffer) >= 3:
+            assert buffer.read_bits(3).tolist() == expected[:3]
+            del expected[:3]
+
+
+def test_write_bytes_aligned_and_unaligned():
+    buffer = BitRingBuffer(64)
+    buffer.write_bytes(b"\xf0")
+    buffer.write_bits([1, 0, 1])
+    buffer.write_bytes(b"\x0f\xaa")
+
+    assert buffer.read_bits(3).tolist() == [1, 1, 1]
+    assert buffer.read_bytes(3) == bits_to_bytes([1, 0, 0, 0, 0, 1, 0, 1] + [0, 0, 0, 0, 1, 1, 1, 1] + [1, 0, 1, 0, 1, 0, 1, 0])
+    assert len(buffer) == 0
+
+
+def test_read_more_than_available_fails():
+    buffer = BitRingBuffer(16)
+    buffer.write_bits([1, 0])
+    with pytest.raises(ValueError):
+        buffer.read_bits(3)
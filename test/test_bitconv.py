@@ -0,0 +1,57 @@
+"""
+
+Pruebas de la capa de conversión vectorizada (app.core.bitconv): cada conversión
+debe dar lo mismo que la versión con cadenas que se usaba antes en los routers.
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import pytest
+from app.core import bitconv
+
+
+rng = random.Random(2024)
+BITS = [rng.randint(0, 1) for _ in range(1000)]
+
+
+def legacy_uint(bits):
+    return int("".join(map(str, bits)), 2)
+
+
+def test_bytes_roundtrip():
+    data = bitconv.bits_to_bytes(BITS[:800])
+    assert data == bytes(legacy_uint(BITS[i:i+8]) for i in range(0, 800, 8))
+    assert bitconv.bytes_to_bits(data).tolist() == BITS[:800]
+
+
+def test_bitstring():
+    assert bitconv.bits_to_bitstring(BITS) == "".join(map(str, BITS))
+
+
+@pytest.mark.parametrize("width", [1, 7, 8, 13, 53, 64, 65, 130])
+def test_uints_any_width(width):
+    values = bitconv.bits_to_uints(BITS, width)
+    expected = [legacy_uint(BITS[i:i+width]) for i in range(0, len(BITS) - width + 1, width)]
+    assert [int(v) for v in values] == expected
+
+
+def test_single_uint():
+    assert bitconv.bits_to_uint(BITS[:300]) == legacy_uint(BITS[:300])
+    assert bitconv.bits_to_uint([]) == 0
+
+
+def test_bytes_to_uints_fast_path():
+    data = bitconv.bits_to_bytes(BITS[:640])
+    assert bitconv.bytes_to_uints(data, 16).tolist() == [legacy_uint(BITS[i:i+16]) for i in range(0, 640, 16)]
+    assert bitconv.bytes_to_uints(data, 12).tolist() == [legacy_uint(BITS[i:i+12]) for i in range(0, 636, 12)]
+
+
+def test_floats():
+    floats = bitconv.bits_to_floats(BITS)
+    assert len(floats) == len(BITS) // 53
+    assert all(0 <= f < 1 for f in floats)
+    assert floats[0] == legacy_uint(BITS[:53]) / 2 ** 53
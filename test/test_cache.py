@@ -0,0 +1,87 @@
+"""
+
+Pruebas de la caché TTL (app.core.cache) y de la caché de usuarios de app.core.db:
+
+                - Las entradas caducan al pasar el TTL (o en su instante de caducidad)
+                - Expulsión LRU al superar el tamaño máximo
+                - get_user solo va a Mongo en el primer acceso, con proyección
+                - update_user y delete_user invalidan la entrada
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+from types import SimpleNamespace
+from app.core.cache import TTLCache
+from app.core import db
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = TTLCache(10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=2)
+
+    clock.now = 3
+    assert cache.get("a") == 1 and cache.get("b") is None
+
+    clock.now = 6
+    assert cache.get("a") is None
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a") # --> "b" pasa a ser el menos reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and len(cache) == 2
+
+
+class CountingCollection:
+    def __init__(self):
+        self.finds = []
+        self.users = {"ana": {"username": "ana", "hashed_password": "hash"}}
+
+    async def find_one(self, filter, projection=None):
+        self.finds.append(projection)
+        return dict(self.users[filter["username"]]) if filter["username"] in self.users else None
+
+    async def update_one(self, filter, update):
+        self.users[filter["username"]].update(update["$set"])
+        return SimpleNamespace(modified_count=1)
+
+    async def delete_one(self, filter):
+        return SimpleNamespace(deleted_count=int(self.users.pop(filter["username"], None) is not None))
+
+
+def test_get_user_cache_and_invalidation(monkeypatch):
+    collection = CountingCollection()
+    monkeypatch.setattr(db, "users_collection", collection)
+    db.user_cache.clear()
+
+    async def scenario():
+        assert (await db.get_user("ana")).hashed_password == "hash"
+        await db.get_user("ana")
+        assert len(collection.finds) == 1 and collection.finds[0] == db.USER_PROJECTION
+
+        await db.update_user("ana", {"hashed_password": "nuevo"})
+        assert (await db.get_user("ana")).hashed_password == "nuevo"
+
+        await db.delete_user("ana")
+        assert await db.get_user("ana") is None
+
+    asyncio.run(scenario())
+    db.user_cache.clear()
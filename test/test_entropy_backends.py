@@ -0,0 +1,75 @@
+"""
+
+Pruebas de los backends de entropía (app.core.entropy_backends):
+
+                - Todos devuelven shots*bits_per_shot bits 0/1 y los shots se acotan a su máximo
+                - El muestreador de Clifford da exactamente el soporte del circuito (comparado con
+                  el vector de estado) sobre circuitos de Clifford aleatorios
+                - El stub es reproducible, solo se entrega con permiso explícito y un nombre desconocido falla
+                - El pool de procesos funciona con un backend distinto de Aer
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector, random_clifford
+from app.core import entropy_backends
+from app.core.entropy_backends import BACKENDS, CliffordSampler, StubBackend, get_backend
+from app.core.entropy_workers import EntropyWorkerPool
+
+
+@pytest.mark.parametrize("name", list(BACKENDS))
+def test_backend_contract(name):
+    backend = get_backend(name, allow_insecure=True)
+    bits = backend.sample_bits(10)
+    assert bits.dtype == np.uint8 and len(bits) == 10 * backend.bits_per_shot
+    assert set(bits.tolist()) <= {0, 1}
+    assert backend.shots_for_deficit(10 ** 12) == backend.max_shots
+    assert backend.shots_for_deficit(backend.bits_per_shot + 1) == 2
+
+
+def test_clifford_sampler_matches_statevector():
+    for seed in range(10):
+        circuit = random_clifford(4, seed=seed).to_circuit()
+        support = {i for i, p in enumerate(Statevector(circuit).probabilities()) if p > 1e-9}
+        circuit.measure_all()
+
+        sampler = CliffordSampler(circuit)
+        samples = sampler.sample(2000)
+        seen = {int(sum(int(bit) << j for j, bit in enumerate(row))) for row in samples}
+        assert seen == support
+        assert len(support) == 2 ** sampler.random_bits
+
+
+def test_clifford_backend_is_uniform():
+    bits = get_backend("clifford").sample_bits(20000).reshape(-1, 28)
+    assert np.abs(bits.mean(axis=0) - 0.5).max() < 0.02 # --> ~6 desviaciones típicas
+
+
+def test_stub_and_unknown_backend():
+    assert (StubBackend(seed=1).sample_bits(5) == StubBackend(seed=1).sample_bits(5)).all()
+    with pytest.raises(ValueError):
+        entropy_backends.get_backend("qpu")
+    with pytest.raises(ValueError, match="no es seguro"):
+        entropy_backends.get_backend("stub", allow_insecure=False)
+
+
+def test_service_refuses_stub_backend():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    env = {**os.environ, "ENTROPY_BACKEND": "stub", "ALLOW_INSECURE_ENTROPY": "false"}
+    result = subprocess.run([sys.executable, "-c", "import app.main"], cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode != 0 and "no es seguro" in result.stderr
+
+
+def test_worker_pool_with_clifford_backend():
+    pool = EntropyWorkerPool(1, "clifford")
+    try:
+        data = pool.collect(pool.submit(3)) # --> se redondea a 4 shots (bytes completos)
+    finally:
+        pool.shutdown()
+    assert len(data) == 4 * 28 // 8
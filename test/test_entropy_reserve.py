@@ -0,0 +1,74 @@
+"""
+
+Pruebas de la reserva persistente de entropía (app.core.entropy_reserve):
+
+                - Lo guardado sobrevive a un reinicio (reabrir el fichero)
+                - Lo consumido no se vuelve a servir y queda a ceros en disco
+                - Un fichero con otra capacidad se descarta
+                - Un segundo proceso no puede abrir la misma reserva (flock) y g_buffer la desactiva
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+import pytest
+from app.core.entropy_reserve import EntropyReserve, ReserveLocked, HEADER
+
+
+def test_survives_restart_and_is_one_time(tmp_path):
+    path = str(tmp_path / "reserve.bin")
+    reserve = EntropyReserve(path, 64)
+    assert reserve.write(bytes(range(1, 41))) == 40
+    assert reserve.read(10) == bytes(range(1, 11))
+    reserve.close()
+
+    reserve = EntropyReserve(path, 64)
+    assert len(reserve) == 30
+    assert reserve.read(100) == bytes(range(11, 41))
+    assert reserve.read(1) == b""
+    reserve.close()
+
+    with open(path, "rb") as file:
+        assert file.read()[HEADER.size:] == bytes(64)
+
+
+def test_wraparound(tmp_path):
+    reserve = EntropyReserve(str(tmp_path / "reserve.bin"), 8)
+    reserve.write(b"abcdef")
+    assert reserve.read(4) == b"abcd"
+    assert reserve.write(b"ghijklmn") == 6
+    assert reserve.read(8) == b"efghijkl"
+    reserve.close()
+
+
+def test_capacity_change_discards_file(tmp_path):
+    path = str(tmp_path / "reserve.bin")
+    reserve = EntropyReserve(path, 16)
+    reserve.write(b"x" * 16)
+    reserve.close()
+
+    reserve = EntropyReserve(path, 32)
+    assert len(reserve) == 0
+    reserve.close()
+
+
+def test_second_open_is_refused(tmp_path):
+    path = str(tmp_path / "reserve.bin")
+    reserve = EntropyReserve(path, 64)
+    reserve.write(b"x" * 40)
+    try:
+        with pytest.raises(ReserveLocked):
+            EntropyReserve(path, 64) # --> flock es por descriptor: también choca dentro del proceso
+
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        code = f"from app.routers.g_buffer import open_reserve; print(open_reserve({path!r}, 64))"
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+        assert output.strip().endswith("None")
+        assert reserve.read(40) == b"x" * 40 # --> la región sigue siendo solo de este proceso
+    finally:
+        reserve.close()
+
+    EntropyReserve(path, 64).close() # --> al cerrar se suelta el lock
@@ -0,0 +1,41 @@
+"""
+
+Pruebas de los formatos de respuesta compactos (app.core.formats).
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from fastapi import Request
+from app.core.formats import negotiate_format, encode_bytes, encode_array
+
+
+def make_request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def test_negotiate_format():
+    assert negotiate_format(make_request("application/json"), None) == "json"
+    assert negotiate_format(make_request("application/octet-stream"), None) == "raw"
+    assert negotiate_format(make_request("application/octet-stream"), "hex") == "hex"
+
+
+def test_encode_bytes():
+    assert encode_bytes(b"\x01\xff", "hex", "k") == {"k": "01ff"}
+    assert encode_bytes(b"\x01\xff", "base64", "k") == {"k": "Af8="}
+    assert encode_bytes(b"\x01\xff", "array", "k") == {"k": [1, 255]}
+
+    response = encode_bytes(b"\x01\xff", "raw", "k")
+    assert response.body == b"\x01\xff"
+    assert response.media_type == "application/octet-stream"
+
+
+def test_encode_array():
+    values = np.array([1, 256], dtype=np.uint16)
+    assert encode_array(values, "array", "k") == {"k": [1, 256]}
+    assert encode_array(values, "hex", "k") == {"k": "01000001", "dtype": "<u2"}
+    assert encode_array(values, "raw", "k").headers["x-dtype"] == "<u2"
+    assert encode_array(np.array([0.5]), "base64", "k") == {"k": "AAAAAAAA4D8=", "dtype": "<f8"}
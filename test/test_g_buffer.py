@@ -0,0 +1,203 @@
+"""
+
+Pruebas del buffer global de entropía (app.routers.g_buffer):
+
+                - Los consumidores síncronos y asíncronos reciben exactamente lo pedido
+                - commit_bits despierta a los consumidores que esperan
+                - Con el buffer detenido (/buffer/off) se responde 503 sin consumir bits
+                - Lo que no cabe en el buffer va a la reserva en disco y se sirve desde ella al vaciarse
+                - La reserva se lee sin el lock del buffer cogido (sus flush a disco no paran a nadie)
+                - Los bits empaquetados salen del buffer como bytes; solo se desempaqueta el último byte incompleto
+                - Un fallo del backend no tumba al productor: se anota en /buffer/state, se reintenta y se recupera
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import json
+import subprocess
+import threading
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.core import bitconv
+from app.core.entropy_reserve import EntropyReserve
+from app.routers import g_buffer
+
+
+def test_sync_and_async_draws():
+    g_buffer.commit_bits([1, 0] * 512)
+
+    assert len(g_buffer.get_bits_from_buffer(10)) == 10
+    assert len(g_buffer.get_bytes_from_buffer(4)) == 4
+    assert len(asyncio.run(g_buffer.aget_bits_from_buffer(10))) == 10
+    assert len(asyncio.run(g_buffer.aget_bytes_from_buffer(4))) == 4
+
+
+def test_commit_wakes_waiting_consumers():
+    with g_buffer.buffer_lock:
+        g_buffer.global_buffer.clear()
+
+    results = []
+
+    async def async_consumer():
+        results.append(await g_buffer.aget_bytes_from_buffer(2))
+
+    threads = [
+        threading.Thread(target=lambda: results.append(g_buffer.get_bytes_from_buffer(2))),
+        threading.Thread(target=lambda: asyncio.run(async_consumer())),
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Si el hilo de llenado no está arrancado, solo este commit puede despertarlos
+    g_buffer.commit_bits([1] * 64)
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert [len(r) for r in results] == [2, 2]
+
+
+def test_off_rejects_draws_without_consuming():
+    g_buffer.off()
+    try:
+        g_buffer.commit_bits([1] * 16)
+        before = len(g_buffer.global_buffer)
+
+        # Más de lo que cabe en el buffer: sin productor no puede completarse nunca
+        with pytest.raises(HTTPException) as error:
+            g_buffer.get_bytes_from_buffer(g_buffer.BUFFER_MAX_CAPACITY // 8 + 1)
+        assert error.value.status_code == 503
+        assert len(g_buffer.global_buffer) >= before # --> no se ha consumido nada
+
+        assert len(g_buffer.get_bytes_from_buffer(2)) == 2
+    finally:
+        g_buffer.on()
+
+
+def test_spill_to_reserve_and_pull_back(tmp_path, monkeypatch):
+    reserve = EntropyReserve(str(tmp_path / "reserve.bin"), 1024)
+    monkeypatch.setattr(g_buffer, "entropy_reserve", reserve)
+    extra = bitconv.bytes_to_bits(bytes(range(1, 101)))
+
+    g_buffer.off() # --> sin productor: solo entra en el buffer y en la reserva lo que se vuelca aquí
+    try:
+        with g_buffer.buffer_lock:
+            g_buffer.global_buffer.clear()
+        g_buffer.commit_bits(np.ones(g_buffer.BUFFER_MAX_CAPACITY, dtype=np.uint8))
+        assert g_buffer.commit_bits(extra) == 0
+        assert len(reserve) == 100
+
+        assert g_buffer.get_bytes_from_buffer(g_buffer.BUFFER_MAX_CAPACITY // 8) == b"\xff" * (g_buffer.BUFFER_MAX_CAPACITY // 8)
+        assert asyncio.run(g_buffer.aget_bytes_from_buffer(100)) == bytes(range(1, 101))
+        assert len(reserve) == 0
+    finally:
+        g_buffer.on()
+        reserve.close()
+
+
+def test_reserve_read_outside_buffer_lock(tmp_path, monkeypatch):
+    reserve = EntropyReserve(str(tmp_path / "reserve.bin"), 1024)
+    monkeypatch.setattr(g_buffer, "entropy_reserve", reserve)
+    reserve.write(bytes(range(1, 65)))
+    locked = []
+    real_read = reserve.read
+
+    def read(nbytes):
+        locked.append(g_buffer.buffer_lock.locked())
+        return real_read(nbytes)
+    monkeypatch.setattr(reserve, "read", read)
+
+    g_buffer.off() # --> solo la reserva puede servir lo que falta
+    try:
+        with g_buffer.buffer_lock:
+            g_buffer.global_buffer.clear()
+        assert g_buffer.get_bytes_from_buffer(32) == bytes(range(1, 33))
+        with g_buffer.buffer_lock:
+            g_buffer.global_buffer.clear()
+        assert asyncio.run(g_buffer.aget_bytes_from_buffer(16)) == bytes(range(33, 49))
+    finally:
+        g_buffer.on()
+        reserve.close()
+
+    assert locked and not any(locked)
+
+
+
+def test_packed_bits_served_as_bytes(monkeypatch):
+    calls = []
+    bit_array = g_buffer.aget_bit_array_from_buffer
+
+    async def tracked_bit_array(n):
+        calls.append(n)
+        return await bit_array(n)
+    monkeypatch.setattr(g_buffer, "aget_bit_array_from_buffer", tracked_bit_array)
+
+    g_buffer.off()
+    try:
+        with g_buffer.buffer_lock:
+            g_buffer.global_buffer.clear()
+        g_buffer.commit_bits(bitconv.bytes_to_bits(b"\xa5\x0f\xff"))
+        assert asyncio.run(g_buffer.aget_packed_bits_from_buffer(16)) == b"\xa5\x0f"
+        assert calls == [] # --> múltiplo de 8: sin desempaquetar
+        assert asyncio.run(g_buffer.aget_packed_bits_from_buffer(3)) == b"\xe0"
+        assert calls == [3]
+    finally:
+        g_buffer.on()
+
+
+# Se ejecuta en un proceso aparte: en este los demás módulos de test ya han arrancado el
+# productor real, que compartiría con la prueba el backend y los contadores de fallos.
+PRODUCER_FAILURE_SCRIPT = """
+import json
+import numpy as np
+from app.routers import g_buffer
+
+class FlakyBackend:
+    name = "flaky"
+    bits_per_shot = 28
+    failures = 2  # --> falla los dos primeros lotes
+
+    def shots_for_deficit(self, missing_bits):
+        return 64
+
+    def sample_bits(self, shots):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("backend caído")
+        return np.ones(shots * self.bits_per_shot, dtype=np.uint8)
+
+g_buffer.entropy_backend = FlakyBackend()
+g_buffer.PRODUCER_RETRY_SECONDS = 0.01
+failing = []
+producer_failed = g_buffer._producer_failed
+
+def record_failure(error):
+    delay = producer_failed(error)
+    state = g_buffer.info()
+    failing.append({key: state[key] for key in ("producer", "producer_failures", "producer_last_error")})
+    return delay
+
+g_buffer._producer_failed = record_failure
+g_buffer.start_buffer_thread()
+data = g_buffer.get_bytes_from_buffer(4)  # --> solo llega si el hilo sigue vivo tras los fallos
+state = g_buffer.info()
+print(json.dumps({"data": data.hex(), "failing": failing, "producer": state["producer"],
+                  "producer_failures": state["producer_failures"], "alive": g_buffer.buffer_thread.is_alive()}))
+"""
+
+
+def test_producer_survives_backend_errors():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    output = subprocess.run([sys.executable, "-c", PRODUCER_FAILURE_SCRIPT], cwd=root,
+                            capture_output=True, text=True, check=True, timeout=60).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["data"] == "ff" * 4 and result["alive"]
+    assert [state["producer"] for state in result["failing"]] == ["fallando", "fallando"]
+    assert [state["producer_failures"] for state in result["failing"]] == [1, 2]
+    assert "backend caído" in result["failing"][-1]["producer_last_error"]["error"]
+    assert result["producer"] != "fallando" and result["producer_failures"] == 0
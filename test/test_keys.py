@@ -0,0 +1,61 @@
+"""
+
+Pruebas de la caché de plantillas de /keys/seed:
+
+                - La plantilla transpilada se reutiliza entre peticiones (sin volver a transpilar)
+                - Al asignar las fases no queda ningún Parameter libre
+                - La semilla tiene la longitud pedida
+                - Con el pool de claves RSA activo, las pruebas de primalidad van a un pool de procesos
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core import quantum_engine
+from app.routers import keys, g_buffer
+
+client = TestClient(app)
+
+
+def setup_module():
+    g_buffer.start_buffer_thread() # --> sin lifespan (TestClient sin with) nadie lo arranca
+
+
+def test_seed_template_is_cached():
+    template = keys.get_seed_template(6)
+    assert len(template.parameters) == 6
+    assert keys.get_seed_template(6) is template
+
+    bound = template.assign_parameters(keys.random_phases(6))
+    assert len(bound.parameters) == 0
+
+
+def test_seed_skips_transpile_on_repeated_requests():
+    client.get("/keys/seed?num_qubits=8")
+
+    with patch.object(quantum_engine, "transpile", side_effect=AssertionError("transpile no debería llamarse")):
+        response = client.get("/keys/seed?num_qubits=8")
+
+    assert response.status_code == 200
+    assert len(response.json()["quantic_random_seed"]) == len("qrs_") + 2
+
+
+def test_rsa_endpoint_returns_valid_keypair():
+    from Crypto.PublicKey import RSA
+
+    response = client.get("/keys/rsa?size=2048")
+    assert response.status_code == 200
+
+    key = RSA.import_key(response.json()["rsa_private_key"])
+    assert key.size_in_bits() == 2048 and key.e == 65537
+    assert client.get("/keys/rsa?size=1024").status_code == 400
+
+
+def test_rsa_pool_tests_primes_out_of_process():
+    # Con el pool de claves activo (RSA_POOL_DEPTHS por defecto), Miller-Rabin no va en el proceso de la API
+    assert keys.PRIME_WORKERS > 0 and keys.prime_engine._executor is not None
@@ -0,0 +1,53 @@
+"""
+
+Pruebas de las métricas (app.core.metrics y /metrics):
+
+                - Los histogramas exportan cubos acumulados, _sum y _count
+                - /metrics usa la plantilla de la ruta como etiqueta, no la URL
+                - Las métricas del buffer salen en la exposición
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core import metrics
+from app.routers import g_buffer
+
+client = TestClient(app)
+
+
+def setup_module():
+    g_buffer.start_buffer_thread() # --> sin lifespan (TestClient sin with) nadie lo arranca
+
+
+def test_histogram_exposition():
+    registry = []
+    histogram = metrics.Histogram("test_seconds", "Prueba.", ("kind",), buckets=(0.1, 1.0), registry=registry)
+    histogram.observe(0.05, kind="a")
+    histogram.observe(0.5, kind="a")
+    histogram.observe(5, kind="a")
+
+    text = metrics.render(registry)
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{kind="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{kind="a"} 3' in text
+
+
+def test_metrics_endpoint():
+    client.get("/random/range?min=1&max=7")
+    client.get("/keys/rsa/pool")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    text = response.text
+    assert 'route="/random/range",status="200"' in text
+    assert 'route="/keys/rsa/pool"' in text
+    assert "quantum_buffer_bits_consumed_total" in text
+    assert "# TYPE quantum_buffer_wait_seconds histogram" in text
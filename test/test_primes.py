@@ -0,0 +1,65 @@
+"""
+
+Pruebas del motor de primos (app.core.primes):
+
+                - Miller-Rabin acierta con primos y compuestos conocidos
+                - La criba no descarta ningún primo de la ventana, tampoco por debajo de SIEVE_LIMIT
+                - Con bits=16 (ventana entre los primos de la criba) salen primos de verdad (sympy)
+                - Un solo candidato aleatorio por primo, con el tamaño exacto pedido
+                - El pool de procesos devuelve el mismo primo que la búsqueda en serie
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from app.core import primes
+
+
+def test_miller_rabin_known_values():
+    assert primes.is_probable_prime(2**127 - 1, 10)
+    assert not primes.is_probable_prime(2**128 + 1, 10)
+    assert not primes.is_probable_prime(561, 10) # --> número de Carmichael
+
+
+def test_sieve_keeps_every_prime():
+    start = 10**6 + 1
+    survivors = set(primes.sieve_window(start, 500).tolist())
+    for i in range(500):
+        if primes.is_probable_prime(start + 2 * i, 20):
+            assert i in survivors
+
+
+def test_generate_prime_uses_one_candidate():
+    engine = primes.PrimeEngine(os.urandom)
+    prime, stats = engine.generate_prime(512)
+
+    assert prime.bit_length() == 512 and prime >> 510 == 0b11
+    assert primes.is_probable_prime(prime, 20)
+    assert stats["entropy_bits"] == 512
+    assert engine.stats()["primes"] == 1
+
+
+def test_pool_finds_same_prime_as_serial():
+    start = bytes.fromhex("c3") + bytes(31)
+    serial = primes.PrimeEngine(lambda n: start)
+    pooled = primes.PrimeEngine(lambda n: start, workers=2)
+    try:
+        assert pooled.generate_prime(256)[0] == serial.generate_prime(256)[0]
+    finally:
+        pooled.shutdown()
+
+
+def test_small_primes_inside_sieve_range():
+    sympy = pytest.importorskip("sympy")
+
+    start = 49153 # --> impar, con los dos bits altos de 16 bits a 1 y por debajo de SIEVE_LIMIT
+    survivors = set(primes.sieve_window(start, 4096).tolist())
+    assert {i for i in range(4096) if sympy.isprime(start + 2 * i)} <= survivors
+
+    engine = primes.PrimeEngine(os.urandom)
+    for _ in range(20):
+        prime, _ = engine.generate_prime(16)
+        assert sympy.isprime(prime) and prime.bit_length() == 16
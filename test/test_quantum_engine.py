@@ -0,0 +1,82 @@
+"""
+
+Pruebas del motor cuántico por lotes (app.core.quantum_engine):
+
+                - Un job de n shots devuelve n*28 bits válidos
+                - Un lote no se puede reproducir con la semilla que reporta el simulador
+                - El circuito transpilado se cachea
+                - El tamaño del lote se adapta al hueco del buffer
+                - El pool de procesos devuelve lotes empaquetados y cuenta lo producido
+                - Importar app.main no carga qiskit ni Crypto; hay un único simulador por proceso
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+import numpy as np
+from app.core import quantum_engine
+from app.config import ENTROPY_MAX_SHOTS
+
+
+def test_sample_bits_shape():
+    bits = quantum_engine.sample_bits(50)
+    assert len(bits) == 50 * quantum_engine.NUM_QUBITS
+    assert set(bits.tolist()) <= {0, 1}
+
+
+def test_batch_not_reproducible_from_seed(monkeypatch):
+    results = []
+    real_run = quantum_engine.run
+
+    def run(circuit, **options):
+        results.append(real_run(circuit, **options))
+        return results[-1]
+    monkeypatch.setattr(quantum_engine, "run", run)
+
+    bits = quantum_engine.sample_bits(1000)
+    seed = results[0].results[0].seed_simulator
+    replay = real_run(quantum_engine.get_entropy_circuit(), shots=1000, memory=True, seed_simulator=seed).get_memory()
+
+    assert replay == results[0].get_memory() # --> el simulador por sí solo sí es reproducible
+    raw = np.frombuffer("".join(replay).encode("ascii"), dtype=np.uint8) - ord("0")
+    replayed_bits = raw.reshape(1000, quantum_engine.NUM_QUBITS)[:, ::-1].ravel()
+    assert not np.array_equal(bits, replayed_bits)
+    assert 0.45 < np.mean(bits != replayed_bits) < 0.55 # --> la mezcla cambia ~la mitad de los bits
+
+
+def test_circuit_is_cached():
+    assert quantum_engine.get_entropy_circuit() is quantum_engine.get_entropy_circuit()
+
+
+def test_app_import_is_lazy_and_simulator_shared():
+    code = "import sys, app.main; print(sorted(m for m in ('qiskit', 'qiskit_aer', 'Crypto') if m in sys.modules))"
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+    assert quantum_engine.get_simulator() is quantum_engine.get_simulator()
+    assert quantum_engine.warm_up()["simulator"] < 0.1 # --> ya creado: no se vuelve a crear
+
+
+def test_shots_for_deficit():
+    assert quantum_engine.shots_for_deficit(1) == 1
+    assert quantum_engine.shots_for_deficit(28) == 1
+    assert quantum_engine.shots_for_deficit(29) == 2
+    assert quantum_engine.shots_for_deficit(10 ** 12) == ENTROPY_MAX_SHOTS
+
+
+def test_worker_pool_produces_packed_bytes():
+    from app.core.entropy_workers import EntropyWorkerPool
+
+    pool = EntropyWorkerPool(1)
+    try:
+        data = pool.collect(pool.submit(3)) # --> se redondea a 4 shots (bytes completos)
+    finally:
+        pool.shutdown()
+
+    assert len(data) == 4 * quantum_engine.NUM_QUBITS // 8
+    (stats,) = pool.stats().values()
+    assert stats["jobs"] == 1 and stats["bits"] == 4 * quantum_engine.NUM_QUBITS
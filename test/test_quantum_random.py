@@ -0,0 +1,60 @@
+"""
+
+Pruebas de los muestreadores de app.routers.quantum_random:
+
+                - Los enteros por lotes caen siempre dentro de [min, max)
+                - Sin sesgo de módulo: todos los valores salen con frecuencia parecida
+                - Rangos de un solo valor y rangos de más de 64 bits
+                - El muestreador gasta cerca de log2(n) bits por entero (no bit_length(n))
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import numpy as np
+from app.routers import g_buffer, quantum_random
+
+
+def setup_module():
+    g_buffer.start_buffer_thread()
+
+
+def test_sample_range_bounds_and_uniformity():
+    values = asyncio.run(quantum_random.sample_range(-3, 3, 60000))
+    assert values.dtype == np.int64
+    assert values.min() >= -3 and values.max() < 3
+
+    counts = np.bincount(values + 3, minlength=6)
+    assert counts.min() > 9000 and counts.max() < 11000 # --> 10000 esperados por valor
+
+
+def test_sample_range_single_value():
+    assert asyncio.run(quantum_random.sample_range(7, 8, 5)).tolist() == [7] * 5
+
+
+def test_sample_range_big_integers():
+    values = asyncio.run(quantum_random.sample_range(0, 2**100, 10))
+    assert values.dtype == object
+    assert all(0 <= v < 2**100 for v in values)
+
+
+def test_sampler_is_bit_economical():
+    usage = {"bits": 0}
+    values = asyncio.run(quantum_random.sample_range(0, 3, 60, usage))
+    assert set(values.tolist()) <= {0, 1, 2}
+
+    # 60 enteros en [0, 3): 95.1 bits teóricos (+ los 32 de margen del estado) frente a 120 con 2 bits por entero
+    assert usage["bits"] <= 60 * np.log2(3) + quantum_random.SAMPLER_PRECISION_BITS + 8
+
+
+def test_group_layout_packs_several_values():
+    j, k, modulus = quantum_random.group_layout(3)
+    assert j > 1 and modulus == 3**j and modulus <= 2**k <= 2**64
+    assert quantum_random.group_layout(2**64 + 1)[0] == 1
+
+    usage = {"bits": 0}
+    asyncio.run(quantum_random.sample_range(0, 3, 30000, usage))
+    assert usage["bits"] < 30000 * 1.65 # --> log2(3) = 1.585 frente a ~2.67 con un valor por candidato
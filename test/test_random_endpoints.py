@@ -0,0 +1,93 @@
+"""
+
+Pruebas de los endpoints de /random que sirven muchos bytes o valores:
+
+                - /random/stream: Content-Length y número exacto de bytes (múltiplo del trozo y no),
+                  el límite de tamaño y el 503 con el buffer detenido
+                - Un flujo de varios trozos cuenta como una sola petición en /random/entropy
+                - /random/bytes devuelve exactamente size bytes (hex y raw)
+                - /random/float?count=N: N valores en [0, 1), cada uno k / 2**53 con k los 53 bits
+                  siguientes del buffer (comprobado con un patrón conocido del backend stub)
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.entropy_backends import StubBackend
+from app.main import app
+from app.routers import g_buffer, quantum_random
+
+client = TestClient(app)
+
+
+def setup_module():
+    g_buffer.start_buffer_thread() # --> sin lifespan (TestClient sin with) nadie lo arranca
+
+
+@pytest.mark.parametrize("size", [1, 3 * quantum_random.STREAM_CHUNK_BYTES, 2 * quantum_random.STREAM_CHUNK_BYTES + 123])
+def test_stream_sends_exact_size(size):
+    response = client.get("/random/stream", params={"size": size})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["content-length"] == str(size)
+    assert len(response.content) == size
+
+
+def test_stream_counts_one_request():
+    before = dict(quantum_random.entropy_usage.get("stream", {"requests": 0, "samples": 0, "bits_consumed": 0}))
+    size = 3 * quantum_random.STREAM_CHUNK_BYTES + 5
+    assert len(client.get("/random/stream", params={"size": size}).content) == size
+
+    stats = quantum_random.entropy_usage["stream"]
+    assert stats["requests"] - before["requests"] == 1
+    assert stats["samples"] - before["samples"] == size
+    assert stats["bits_consumed"] - before["bits_consumed"] == 8 * size
+
+
+def test_stream_size_limit():
+    assert client.get("/random/stream", params={"size": quantum_random.STREAM_MAX_BYTES + 1}).status_code == 422
+    assert client.get("/random/stream", params={"size": 0}).status_code == 422
+
+
+def test_stream_buffer_off():
+    g_buffer.off()
+    try:
+        # Más de lo que cabe en el buffer: sin productor no puede servirse entero
+        response = client.get("/random/stream", params={"size": g_buffer.BUFFER_MAX_CAPACITY // 8 + 1})
+        assert response.status_code == 503
+    finally:
+        g_buffer.on()
+
+
+def test_bytes_size():
+    response = client.get("/random/bytes", params={"size": 100})
+    assert response.status_code == 200
+    assert len(bytes.fromhex(response.json()["random_bytes"])) == 100
+    assert len(client.get("/random/bytes", params={"size": 37, "format": "raw"}).content) == 37
+
+
+def test_float_count_in_unit_interval():
+    floats = client.get("/random/float", params={"count": 500}).json()["random_floats"]
+    assert len(floats) == 500
+    assert all(0.0 <= value < 1.0 for value in floats)
+
+
+def test_float_uses_53_bit_mantissa():
+    count = 4
+    bits = StubBackend(seed=7).sample_bits(2 * count) # --> 2 shots * 28 = 56 bits por float, sobran
+    expected = [int("".join(map(str, bits[53 * i:53 * (i + 1)])), 2) / 2 ** 53 for i in range(count)]
+
+    g_buffer.off() # --> sin productor: el buffer solo tiene el patrón conocido
+    try:
+        with g_buffer.buffer_lock:
+            g_buffer.global_buffer.clear()
+            g_buffer.global_buffer.write_bits(bits)
+        response = client.get("/random/float", params={"count": count})
+    finally:
+        g_buffer.on()
+
+    assert response.json()["random_floats"] == expected
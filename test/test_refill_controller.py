@@ -0,0 +1,32 @@
+"""
+
+Pruebas del control de rellenado por marcas de agua (app.core.refill_controller).
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from app.core.refill_controller import RefillController
+
+
+def test_watermarks():
+    controller = RefillController(1000, 0.25, 0.75)
+    assert controller.needs_refill(249)
+    assert not controller.needs_refill(250)
+    assert controller.is_full(750)
+    assert controller.batch_bits(100) == 650
+
+
+def test_invalid_watermarks():
+    with pytest.raises(ValueError):
+        RefillController(1000, 0.8, 0.5)
+
+
+def test_time_to_empty_without_drain():
+    controller = RefillController(1000, 0.5, 1.0)
+    assert controller.time_to_empty(1000) is None
+    snapshot = controller.snapshot(1000)
+    assert snapshot["bits_produced"] == 0 and snapshot["bits_consumed"] == 0
@@ -0,0 +1,42 @@
+"""
+
+Pruebas del pool de claves RSA precalculadas (app.core.rsa_pool):
+
+                - Se rellena en segundo plano hasta la profundidad de cada tamaño
+                - Cada par se entrega una sola vez y, vacío, take() devuelve None
+                - Al sacar un par, el hilo vuelve a rellenar
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import itertools
+import time
+from app.core.rsa_pool import RSAKeyPool, parse_depths
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_parse_depths():
+    assert parse_depths("2048:4, 4096:1") == {2048: 4, 4096: 1}
+
+
+def test_pool_hands_out_each_keypair_once():
+    counter = itertools.count()
+    pool = RSAKeyPool(lambda size: (size, next(counter)), {2048: 3, 4096: 0})
+    pool.start()
+    _wait_for(lambda: pool.snapshot()["2048"]["available"] == 3)
+
+    served = [pool.take(2048) for _ in range(3)]
+    assert len(set(served)) == 3
+    assert pool.take(4096) is None
+
+    _wait_for(lambda: pool.snapshot()["2048"]["available"] == 3) # --> rellenado tras vaciarlo
+    assert not set(served) & {pool.take(2048) for _ in range(3)}
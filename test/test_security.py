@@ -0,0 +1,86 @@
+"""
+
+Pruebas del hasheo de contraseñas fuera del bucle de eventos (app.core.security):
+
+                - El bucle sigue atendiendo otras corrutinas mientras bcrypt trabaja
+                - Los hashes con otro coste se re-hashean al verificar
+                - Si la cola del pool de bcrypt no avanza a tiempo, se responde 503
+                - Un token ya verificado no se vuelve a decodificar, salvo tras revocarlo o rotar el secreto
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.core import security
+from app.models.user import User
+
+
+def test_hashing_does_not_block_event_loop():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        hashed = await security.hash_password("secreto")
+        valid, _ = await security.verify_and_update_password("secreto", hashed)
+        task.cancel()
+        return valid, ticks
+
+    valid, ticks = asyncio.run(scenario())
+    assert valid and ticks > 10
+
+
+def test_rehash_on_rounds_change(monkeypatch):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secreto")
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password("secreto", old_hash))
+    assert valid and new_hash.startswith("$2b$05$")
+
+    assert asyncio.run(security.verify_and_update_password("otra", old_hash)) == (False, None)
+
+
+def test_queue_timeout_returns_503(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_QUEUE_TIMEOUT_SECONDS", -1)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(security.hash_password("secreto"))
+    assert error.value.status_code == 503
+
+
+def test_verified_token_cache(monkeypatch):
+    async def fake_get_user(username):
+        return User(username=username, hashed_password="hash")
+
+    monkeypatch.setattr(security, "get_user", fake_get_user)
+    monkeypatch.setattr(security, "SECRET_KEY", "secreto-de-prueba-con-32-bytes-o-mas")
+    security.revoke_tokens()
+    token = security.create_access_token({"sub": "ana"})
+
+    assert asyncio.run(security.get_current_user(token)).username == "ana"
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("el token debería salir de la caché")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(security.jwt, "decode", no_decode)
+        assert asyncio.run(security.get_current_user(token)).username == "ana"
+
+    assert security.revoke_tokens("ana") == 1
+
+    security.rotate_secret("otro-secreto-de-prueba-de-32-bytes")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(security.get_current_user(token))
+    assert error.value.status_code == 401
+    security.revoke_tokens()
@@ -0,0 +1,170 @@
+"""
+
+Pruebas de los usuarios contra la colección en memoria de benchmarks/fake_mongo.py:
+
+                - Paginación por cursor: las páginas encadenadas con X-Next-Cursor cubren todos los usuarios,
+                  también con usernames no Latin-1 (el cursor va en base64), y un cursor corrupto da 400
+                - Nunca se devuelve hashed_password
+                - Modo NDJSON: un usuario por línea, todos desde el cursor
+                - Alta masiva (POST /users/bulk) en JSON y NDJSON: resultado por usuario con duplicados
+                  (ya existentes y repetidos en la petición) e inválidos, y contraseñas hasheadas
+                - Si un lote de la alta masiva falla entero (p.ej. timeout de Mongo), sus usuarios salen
+                  como "error" y el resto de lotes se insertan igual
+                - Lifespan: crea el índice único de username, calienta el pool y cierra el cliente y los pools de procesos
+                - Sin MongoDB la app arranca igual (init_db avisa y no lanza)
+
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+import fake_mongo
+from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError, NetworkTimeout
+from app.main import app
+from app.core import db
+from app.routers import keys
+from app.routers.users import encode_cursor
+from app.core.password_pool import PasswordHashPool
+from passlib.context import CryptContext
+from app.core.security import get_current_user
+from app.models.user import User
+
+
+@pytest.fixture
+def client(monkeypatch):
+    collection = fake_mongo.FakeCollection()
+    monkeypatch.setattr("app.core.db.users_collection", collection)
+    for i in range(25):
+        asyncio.run(collection.insert_one({"username": f"user{i:02d}", "hashed_password": "hash", "role": "tester"}))
+
+    app.dependency_overrides[get_current_user] = lambda: User(username="admin", hashed_password="hash")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_cursor_pagination(client):
+    usernames = []
+    cursor = None
+    while True:
+        response = client.get("/users/", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert all("hashed_password" not in user for user in page)
+        usernames += [user["username"] for user in page]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert usernames == [f"user{i:02d}" for i in range(25)]
+
+
+def test_cursor_with_non_ascii_username(client):
+    asyncio.run(db.users_collection.insert_one({"username": "日本", "hashed_password": "hash"}))
+
+    response = client.get("/users/", params={"limit": 26})
+    assert response.status_code == 200
+    assert response.json()[-1]["username"] == "日本"
+    cursor = response.headers["x-next-cursor"]
+    assert cursor == encode_cursor("日本")
+
+    response = client.get("/users/", params={"limit": 26, "cursor": cursor})
+    assert response.status_code == 200 and response.json() == []
+
+    assert client.get("/users/", params={"cursor": "@@"}).status_code == 400
+
+
+def test_ndjson_stream(client):
+    response = client.get("/users/", params={"stream": "true", "cursor": encode_cursor("user19")})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["username"] for user in users] == [f"user{i:02d}" for i in range(20, 25)]
+    assert users[0]["role"] == "tester" and "hashed_password" not in users[0]
+
+
+def test_bulk_create(client, monkeypatch):
+    pool = PasswordHashPool(workers=2, rounds=4)
+    monkeypatch.setattr("app.core.security.bulk_password_pool", pool)
+    monkeypatch.setattr("app.core.db.BULK_USERS_BATCH_SIZE", 3)
+    asyncio.run(db.users_collection.create_index("username", unique=True))
+    try:
+        users = [{"username": f"new{i}", "password": f"pw{i}", "role": "bulk"} for i in range(5)]
+        users += [{"username": "user03", "password": "x"}, {"username": "new1", "password": "y"}, {"username": "sinpass"}]
+        response = client.post("/users/bulk", json=users)
+        assert response.status_code == 200
+        body = response.json()
+        assert [result["status"] for result in body["results"]] == ["created"] * 5 + ["duplicate", "duplicate", "invalid"]
+        assert body["summary"] == {"created": 5, "duplicate": 2, "invalid": 1}
+
+        ndjson = "\n".join(json.dumps({"username": name, "password": "pw"}) for name in ["new0", "otro"])
+        response = client.post("/users/bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+        assert [result["status"] for result in response.json()["results"]] == ["duplicate", "created"]
+    finally:
+        pool.shutdown()
+
+    stored = asyncio.run(db.users_collection.find_one({"username": "new2"}))
+    assert stored["role"] == "bulk" and "password" not in stored
+    assert CryptContext(schemes=["bcrypt"]).verify("pw2", stored["hashed_password"])
+
+
+def test_bulk_create_batch_failure(client, monkeypatch):
+    pool = PasswordHashPool(workers=1, rounds=4)
+    monkeypatch.setattr("app.core.security.bulk_password_pool", pool)
+    monkeypatch.setattr("app.core.db.BULK_USERS_BATCH_SIZE", 2)
+    real_insert_many = db.users_collection.insert_many
+    calls = []
+
+    async def insert_many(documents, ordered=True):
+        calls.append(len(documents))
+        if len(calls) == 2:
+            raise NetworkTimeout("timed out")
+        return await real_insert_many(documents, ordered=ordered)
+    monkeypatch.setattr(db.users_collection, "insert_many", insert_many)
+    try:
+        response = client.post("/users/bulk", json=[{"username": f"lote{i}", "password": "pw"} for i in range(5)])
+    finally:
+        pool.shutdown()
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created", "created", "error", "error", "created"]
+    assert results[2]["detail"] == "timed out"
+    assert calls == [2, 2, 1]
+
+
+def test_lifespan_indexes_warmup_and_close(monkeypatch):
+    collection = fake_mongo.FakeCollection()
+    client = fake_mongo.FakeClient()
+    monkeypatch.setattr("app.core.db.users_collection", collection)
+    monkeypatch.setattr("app.core.db.client", client)
+
+    with TestClient(app):
+        assert client.commands == ["ping"] * max(1, db.MONGO_MIN_POOL_SIZE)
+        assert not client.closed
+    assert client.closed
+    assert keys.prime_engine._executor is None # --> pool de primos cerrado (después se busca en serie)
+
+    asyncio.run(collection.insert_one({"username": "ana"}))
+    with pytest.raises(DuplicateKeyError):
+        asyncio.run(collection.insert_one({"username": "ana"}))
+
+
+def test_init_db_without_mongo(monkeypatch):
+    class DownAdmin:
+        async def command(self, name):
+            raise ServerSelectionTimeoutError("no hay servidores")
+
+    client = fake_mongo.FakeClient()
+    client.admin = DownAdmin()
+    monkeypatch.setattr("app.core.db.users_collection", fake_mongo.FakeCollection())
+    monkeypatch.setattr("app.core.db.client", client)
+
+    report = asyncio.run(db.init_db())
+    assert "no hay servidores" in report["error"]
+    assert "indexes_seconds" in report